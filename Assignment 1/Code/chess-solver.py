@@ -1,9 +1,9 @@
 import time
 import psutil
 import os
+from array import array
 from collections import deque
 import heapq
-import copy
 
 class ChessPiece:
     def __init__(self, piece_type, position):
@@ -48,135 +48,172 @@ class Move:
         row_number = 8 - row
         return f"{col_letter}{row_number}"
 
+# Squares are numbered row * 8 + col, so a set of squares is a 64-bit int with
+# bit `square` set for each of them (a bitboard).
+PIECE_TYPES = 'KQRBNP'
+ALL_SQUARES = (1 << 64) - 1
+FILE_A = 0x0101010101010101  # col 0
+NOT_A = ALL_SQUARES & ~FILE_A
+NOT_AB = ALL_SQUARES & ~(FILE_A | FILE_A << 1)
+NOT_H = ALL_SQUARES & ~(FILE_A << 7)
+NOT_GH = ALL_SQUARES & ~(FILE_A << 6 | FILE_A << 7)
+
+# (shift, mask): moving a bitboard one step is a shift by row * 8 + col, and
+# the mask drops the squares that wrapped around to the other side of the board.
+KNIGHT_STEPS = [(17, NOT_A), (15, NOT_H), (-15, NOT_A), (-17, NOT_H),
+                (10, NOT_AB), (6, NOT_GH), (-6, NOT_AB), (-10, NOT_GH)]
+KING_STEPS = [(1, NOT_A), (-1, NOT_H), (8, ALL_SQUARES), (-8, ALL_SQUARES),
+              (9, NOT_A), (7, NOT_H), (-7, NOT_A), (-9, NOT_H)]
+PAWN_STEPS = [(-9, NOT_H), (-7, NOT_A)]  # up the board, one column either way
+
+
+def shift(bits, step):
+    delta, mask = step
+    return (bits << delta if delta > 0 else bits >> -delta) & mask
+
+
+def squares(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def square_pos(square):
+    return divmod(square, 8)
+
+
+def _ray(square, step):
+    bits, x = 0, shift(1 << square, step)
+    while x:
+        bits |= x
+        x = shift(x, step)
+    return bits
+
+
+# Attack tables, built once: the squares a king, knight or pawn on each square
+# reaches, and for every direction the ray of squares a slider on each square
+# looks along. The nearest piece on a ray is its lowest set bit when the
+# direction goes up the square numbers and its highest set bit otherwise.
+JUMP_ATTACKS = {piece_type: [sum(shift(1 << square, step) for step in steps) for square in range(64)]
+                for piece_type, steps in (('K', KING_STEPS), ('N', KNIGHT_STEPS), ('P', PAWN_STEPS))}
+RAYS = [(step[0] > 0, [_ray(square, step) for square in range(64)]) for step in KING_STEPS]
+SLIDING_RAYS = {'Q': RAYS, 'R': RAYS[:4], 'B': RAYS[4:]}
+
+
+def attacks(piece_type, square, occupied):
+    """Bitboard of the squares a piece on `square` could capture on, given every occupied square."""
+    if piece_type in JUMP_ATTACKS:
+        return JUMP_ATTACKS[piece_type][square] & occupied
+    targets = 0
+    for ascending, rays in SLIDING_RAYS[piece_type]:
+        blockers = rays[square] & occupied
+        if blockers:
+            targets |= blockers & -blockers if ascending else 1 << (blockers.bit_length() - 1)
+    return targets
+
+
 class ChessState:
-    def __init__(self, pieces, last_move=None):
-        self.pieces = pieces
+    def __init__(self, pieces, last_move=None, boards=None):
+        # boards[k] holds the squares of the pieces of type PIECE_TYPES[k]
+        if boards is None:
+            boards = [0] * len(PIECE_TYPES)
+            for p in pieces:
+                row, col = p.position
+                boards[PIECE_TYPES.index(p.piece_type)] |= 1 << (row * 8 + col)
+        self.boards = boards
+        self.occupied = 0
+        for bits in boards:
+            self.occupied |= bits
         self.board_size = 8
         self.last_move = last_move
-        
+
+    @property
+    def pieces(self):
+        return [ChessPiece(piece_type, square_pos(square))
+                for piece_type, bits in zip(PIECE_TYPES, self.boards) for square in squares(bits)]
+
     def __hash__(self):
-        return hash(tuple(sorted((p.piece_type, p.position) for p in self.pieces)))
+        return hash(tuple(self.boards))
     
     def __eq__(self, other):
         if not isinstance(other, ChessState):
             return False
-        return self.__hash__() == other.__hash__()
+        return self.boards == other.boards
     
     def __repr__(self):
-        return f"ChessState with {len(self.pieces)} pieces"
+        return f"ChessState with {self.piece_count()} pieces"
+
+    def piece_count(self):
+        return bin(self.occupied).count('1')
     
     def is_goal(self):
-        return len(self.pieces) == 1
+        return self.occupied & (self.occupied - 1) == 0
     
     def get_valid_moves(self, piece):
-        moves = []
         row, col = piece.position
-        
-        if piece.piece_type == 'P':  # Pawn
-            captures = [(row-1, col-1), (row-1, col+1)]
-            for new_pos in captures:
-                if self._is_valid_capture(piece, new_pos):
-                    moves.append(new_pos)
-                    
-        elif piece.piece_type == 'R':  # Rook
-            directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-            moves.extend(self._get_sliding_moves(piece, directions))
-            
-        elif piece.piece_type == 'B':  # Bishop
-            directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-            moves.extend(self._get_sliding_moves(piece, directions))
-            
-        elif piece.piece_type == 'N':  # Knight
-            knight_moves = [
-                (row+2, col+1), (row+2, col-1),
-                (row-2, col+1), (row-2, col-1),
-                (row+1, col+2), (row+1, col-2),
-                (row-1, col+2), (row-1, col-2)
-            ]
-            for new_pos in knight_moves:
-                if self._is_valid_capture(piece, new_pos):
-                    moves.append(new_pos)
-                    
-        elif piece.piece_type == 'Q':  # Queen
-            directions = [(0, 1), (0, -1), (1, 0), (-1, 0),
-                         (1, 1), (1, -1), (-1, 1), (-1, -1)]
-            moves.extend(self._get_sliding_moves(piece, directions))
-            
-        elif piece.piece_type == 'K':  # King
-            king_moves = [
-                (row+dr, col+dc)
-                for dr in [-1, 0, 1]
-                for dc in [-1, 0, 1]
-                if (dr, dc) != (0, 0)
-            ]
-            for new_pos in king_moves:
-                if self._is_valid_capture(piece, new_pos):
-                    moves.append(new_pos)
-                    
-        return moves
-    
-    def _is_valid_capture(self, piece, new_pos):
-        row, col = new_pos
-        if not (0 <= row < self.board_size and 0 <= col < self.board_size):
-            return False
-            
-        # Check if there's a piece to capture at the new position
-        for p in self.pieces:
-            if p.position == new_pos and p != piece:
-                return True
-        return False
-    
-    def _get_sliding_moves(self, piece, directions):
-        moves = []
-        for dr, dc in directions:
-            row, col = piece.position
-            while True:
-                row, col = row + dr, col + dc
-                if not (0 <= row < self.board_size and 0 <= col < self.board_size):
-                    break
-                if self._is_valid_capture(piece, (row, col)):
-                    moves.append((row, col))
-                    break
-                if any(p.position == (row, col) for p in self.pieces):
-                    break
-        return moves
+        return [square_pos(square) for square in squares(attacks(piece.piece_type, row * 8 + col, self.occupied))]
     
+    def captures(self):
+        """Yield (from_square, to_square) for every capture on the board."""
+        boards, occupied = self.boards, self.occupied
+        for kind, piece_type in enumerate(PIECE_TYPES):
+            for square in squares(boards[kind]):
+                for target in squares(attacks(piece_type, square, occupied)):
+                    yield square, target
+
+    def after(self, from_square, to_square, with_move=True):
+        """The state after the piece on from_square captures on to_square.
+
+        Searches pass with_move=False and only attach the Move (and its
+        ChessPiece objects) to the states on the solution path.
+        """
+        from_bit, to_bit = 1 << from_square, 1 << to_square
+        boards = self.boards[:]
+        kind = next(k for k, bits in enumerate(boards) if bits & from_bit)
+        captured = next(k for k, bits in enumerate(boards) if bits & to_bit)
+        boards[captured] ^= to_bit
+        boards[kind] ^= from_bit | to_bit
+        move_info = None
+        if with_move:
+            move_info = Move(
+                ChessPiece(PIECE_TYPES[kind], square_pos(from_square)),  # Original piece
+                square_pos(from_square),  # From position
+                square_pos(to_square),  # To position
+                ChessPiece(PIECE_TYPES[captured], square_pos(to_square))  # Captured piece
+            )
+        return ChessState(None, move_info, boards)
+
     def get_next_states(self):
-        next_states = []
-        for piece in self.pieces:
-            valid_moves = self.get_valid_moves(piece)
-            for move_to in valid_moves:
-                new_pieces = []
-                captured_piece = None
-                original_pos = piece.position
-                
-                for p in self.pieces:
-                    if p.position == move_to:  # This is the captured piece
-                        captured_piece = p
-                    elif p == piece:  # This is the moving piece
-                        new_piece = ChessPiece(p.piece_type, move_to)
-                        new_pieces.append(new_piece)
-                    else:  # Other pieces remain unchanged
-                        new_pieces.append(copy.deepcopy(p))
-                
-                # Create a Move object to track this capture
-                move_info = Move(
-                    piece,  # Original piece
-                    original_pos,  # From position
-                    move_to,  # To position
-                    captured_piece  # Captured piece
-                )
-                next_states.append(ChessState(new_pieces, move_info))
-        return next_states
+        return [self.after(from_square, to_square) for from_square, to_square in self.captures()]
+
+# Search nodes live in two parallel arrays instead of carrying their path:
+# node k was reached from node parents[k] by the capture moves[k]
+# (from_square << 6 | to_square), and node 0 is the initial state. The path
+# is replayed from the moves only once a goal is found.
+def _new_nodes():
+    return array('i', [-1]), array('H', [0])
+
+def _rebuild_path(initial_state, parents, moves, node):
+    codes = []
+    while node > 0:
+        codes.append(moves[node])
+        node = parents[node]
+    path, state = [], initial_state
+    for code in reversed(codes):
+        state = state.after(code >> 6, code & 63)
+        path.append(state)
+    return path
 
 def bfs_search(initial_state):
-    queue = deque([(initial_state, [])])
+    parents, moves = _new_nodes()
+    queue = deque([(initial_state, 0)])
     visited = set()
     
     while queue:
-        current_state, path = queue.popleft()
+        current_state, node = queue.popleft()
         if current_state.is_goal():
-            return path
+            return _rebuild_path(initial_state, parents, moves, node)
             
         state_hash = hash(current_state)
         if state_hash in visited:
@@ -184,22 +221,26 @@ def bfs_search(initial_state):
             
         visited.add(state_hash)
         
-        for next_state in current_state.get_next_states():
+        for from_square, to_square in current_state.captures():
+            next_state = current_state.after(from_square, to_square, with_move=False)
             if hash(next_state) not in visited:
-                new_path = path + [next_state]
-                queue.append((next_state, new_path))
+                parents.append(node)
+                moves.append(from_square << 6 | to_square)
+                queue.append((next_state, len(parents) - 1))
     
     return None
 
 def heuristic(state):
-    return len(state.pieces) - 1
+    return state.piece_count() - 1
 
 class PrioritizedState:
-    def __init__(self, f_score, steps, state, path):
+    __slots__ = ('f_score', 'steps', 'state', 'node')
+
+    def __init__(self, f_score, steps, state, node):
         self.f_score = f_score
         self.steps = steps
         self.state = state
-        self.path = path
+        self.node = node
         
     def __lt__(self, other):
         if self.f_score == other.f_score:
@@ -207,7 +248,8 @@ class PrioritizedState:
         return self.f_score < other.f_score
 
 def a_star_search(initial_state):
-    frontier = [PrioritizedState(heuristic(initial_state), 0, initial_state, [])]
+    parents, moves = _new_nodes()
+    frontier = [PrioritizedState(heuristic(initial_state), 0, initial_state, 0)]
     visited = set()
     
     while frontier:
@@ -215,7 +257,7 @@ def a_star_search(initial_state):
         current_state = current.state
         
         if current_state.is_goal():
-            return current.path
+            return _rebuild_path(initial_state, parents, moves, current.node)
             
         state_hash = hash(current_state)
         if state_hash in visited:
@@ -223,14 +265,16 @@ def a_star_search(initial_state):
             
         visited.add(state_hash)
         
-        for next_state in current_state.get_next_states():
+        for from_square, to_square in current_state.captures():
+            next_state = current_state.after(from_square, to_square, with_move=False)
             if hash(next_state) not in visited:
                 next_steps = current.steps + 1
                 h_score = heuristic(next_state)
                 f_score = next_steps + h_score
-                new_path = current.path + [next_state]
+                parents.append(current.node)
+                moves.append(from_square << 6 | to_square)
                 heapq.heappush(frontier, 
-                    PrioritizedState(f_score, next_steps, next_state, new_path))
+                    PrioritizedState(f_score, next_steps, next_state, len(parents) - 1))
     
     return None
 
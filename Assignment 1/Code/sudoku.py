@@ -1,199 +1,323 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-import random
-import heapq
-import time
-import tracemalloc
-import gc
-
-def is_valid(board, row, col, num):
-    for i in range(9):
-        if board[row][i] == num or board[i][col] == num:
-            return False
-    
-    start_row, start_col = 3 * (row // 3), 3 * (col // 3)   
-    for i in range(3):
-        for j in range(3):
-            if board[start_row + i][start_col + j] == num:
-                return False
-    
-    return True
-
-def dfs_solve(board):
-    for row in range(9):
-        for col in range(9):
-            if board[row][col] == 0:
-                for num in range(1, 10):
-                    if is_valid(board, row, col, num):
-                        board[row][col] = num
-                        gc.collect()
-                        entries[row][col].delete(0, tk.END)
-                        entries[row][col].insert(0, str(num))
-                        entries[row][col].config(fg="blue")
-                        root.update_idletasks()
-                        # time.sleep(0.001) # Chờ 0.1 giây để thấy rõ thay đổi
-                        # root.after(1, dfs_solve)
-                        if dfs_solve(board):
-                            return True
-                        board[row][col] = 0
-                return False
-    return True
+import queue
+import threading
+from sudoku_solver import (dfs_solve, heuristic_solve, dlx_solve, propagation_solve, SolveCancelled, BoardTracker,
+                           SolverStats)
+from sudoku_generator import PuzzlePool
+from sudoku_trace import record
 
-def stop_solving():
-    global solving
-    solving = False
+CONFLICT_BG = "#ffcccc"
+SELECTED_BG = "#dde8ff"
+GIVEN_FG, USER_FG, SOLVER_FG = "black", "dark green", "blue"
+BOARD_SIZES = {3: "9x9", 4: "16x16", 5: "25x25"}
+FONT_SIZES = {3: 18, 4: 12, 5: 9}
+CELL_SIZES = {3: 44, 4: 34, 5: 26}
+MARGIN = 4
+
+# The grid is one Canvas with a rectangle and a text item per cell. Changes
+# only update the model below and mark cells dirty; render() redraws the
+# dirty cells in one batch per frame, however many steps arrived since.
+size = 9
+cell_px = CELL_SIZES[3]
+values = []        # digit shown in each cell, 0 for blank
+colors = []        # text colour of each cell
+givens = []        # cells that belong to the puzzle and cannot be edited
+cell_rects, cell_texts = [], []
+dirty = set()
+render_job = None
+selected = None
+
+def build_grid(box):
+    global size, cell_px, values, colors, givens, cell_rects, cell_texts, selected
+    size = box * box
+    cell = cell_px = CELL_SIZES.get(box, 22)
+    font = ('Arial', FONT_SIZES.get(box, 8))
+    canvas.delete('all')
+    canvas.config(width=size * cell + 2 * MARGIN, height=size * cell + 2 * MARGIN)
+    cell_rects, cell_texts = [], []
+    for idx in range(size * size):
+        x, y = MARGIN + (idx % size) * cell, MARGIN + (idx // size) * cell
+        cell_rects.append(canvas.create_rectangle(x, y, x + cell, y + cell, fill="white", outline="#bbbbbb"))
+        cell_texts.append(canvas.create_text(x + cell // 2, y + cell // 2, text="", font=font))
+    # Heavier lines on the box edges.
+    for k in range(0, size + 1, box):
+        pos = MARGIN + k * cell
+        canvas.create_line(pos, MARGIN, pos, MARGIN + size * cell, width=2)
+        canvas.create_line(MARGIN, pos, MARGIN + size * cell, pos, width=2)
+    values, colors, givens = [0] * (size * size), [USER_FG] * (size * size), [False] * (size * size)
+    selected = None
+    track_board([[0] * size for _ in range(size)])
+
+def schedule_render():
+    global render_job
+    if render_job is None and dirty:
+        render_job = root.after(FRAME_MS, render)
+
+def render():
+    global render_job
+    render_job = None
+    for idx in dirty:
+        num = values[idx]
+        if tracker.conflicts(idx):
+            bg = CONFLICT_BG
+        else:
+            bg = SELECTED_BG if idx == selected else "white"
+        canvas.itemconfig(cell_rects[idx], fill=bg)
+        canvas.itemconfig(cell_texts[idx], text=str(num) if num else "", fill=colors[idx])
+    dirty.clear()
+
+def recolor(cells):
+    dirty.update(cells)
+    schedule_render()
+
+def track_board(grid):
+    global tracker
+    tracker = BoardTracker(grid)
+    recolor(range(len(grid) ** 2))
+
+def load_board(grid):
+    # Show a fresh puzzle: its clues become fixed givens, everything else is blank.
+    for idx in range(size * size):
+        values[idx] = grid[idx // size][idx % size]
+        givens[idx] = values[idx] != 0
+        colors[idx] = GIVEN_FG
+    track_board(grid)
+
+def on_click(event):
+    global selected
+    row, col = (event.y - MARGIN) // cell_px, (event.x - MARGIN) // cell_px
+    if 0 <= row < size and 0 <= col < size:
+        if selected is not None:
+            dirty.add(selected)
+        selected = row * size + col
+        recolor([selected])
+    canvas.focus_set()
+
+def on_key(event):
+    global selected
+    if selected is None:
+        return
+    moves = {'Up': -size, 'Down': size, 'Left': -1, 'Right': 1}
+    if event.keysym in moves:
+        target = selected + moves[event.keysym]
+        if 0 <= target < size * size and (event.keysym in ('Up', 'Down') or target // size == selected // size):
+            dirty.add(selected)
+            selected = target
+            recolor([selected])
+        return
+    if event.keysym in ('BackSpace', 'Delete', 'space'):
+        set_user_digit(selected, 0)
+    elif event.char.isdigit():
+        # On boards past 9x9, a second key press extends the number (1 then 6 is 16).
+        num = values[selected] * 10 + int(event.char)
+        set_user_digit(selected, num if 0 < num <= size else int(event.char))
+
+def set_user_digit(idx, num):
+    if givens[idx] or not 0 <= num <= size:
+        return
+    values[idx] = num
+    colors[idx] = USER_FG
+    dirty.add(idx)
+    recolor(tracker.set(idx, num))
+    if tracker.is_complete():
+        status_label.config(text="Solved!")
+    elif tracker.duplicates:
+        status_label.config(text="Some digits conflict.")
+    elif tracker.solvable():
+        status_label.config(text="Still solvable.")
+    else:
+        status_label.config(text="No solution from here.")
 
 def reset_game():
-    global board, original_board
-    for i in range(9):
-        for j in range(9):
-            entries[i][j].config(state='normal')
-            entries[i][j].delete(0, tk.END)
-            if original_board[i][j] != 0:
-                entries[i][j].insert(0, str(original_board[i][j]))
-                entries[i][j].config(state='disabled')
-            else:
-                entries[i][j].config(fg="black")
+    global board
+    stop_solving()
+    load_board(original_board)
     board = [row[:] for row in original_board]
 
-def find_candidates(board, row, col):
-    candidates = set(range(1, 10))
-    for i in range(9):
-        candidates.discard(board[row][i])
-        candidates.discard(board[i][col])
-    r, c = (row // 3) * 3, (col // 3) * 3
-    for i in range(3):
-        for j in range(3):
-            candidates.discard(board[r + i][c + j])
-    return list(candidates)
-
-def heuristic_solve(board):
-    empty_cells = [(len(find_candidates(board, row, col)), row, col)
-                   for row in range(9) for col in range(9) if board[row][col] == 0]
-    heapq.heapify(empty_cells)
-    
-    def backtrack():
-        if not empty_cells:
-            return True
-        
-        _, row, col = heapq.heappop(empty_cells)
-        candidates = find_candidates(board, row, col)
-
-        for num in candidates:
-            board[row][col] = num
-            gc.collect()
-            entries[row][col].delete(0, tk.END)
-            entries[row][col].insert(0, str(num))
-            entries[row][col].config(fg="blue")
-            root.update_idletasks()
-            # time.sleep(0.001) # Chờ 0.1 giây để thấy rõ thay đổi
-            # root.after(1, backtrack)
-            if backtrack():
-                return True
-            board[row][col] = 0
-
-        heapq.heappush(empty_cells, (len(candidates), row, col))
-        return False
-    
-    return backtrack()
-
-def generate_board():
-    board = [[0] * 9 for _ in range(9)]
-    for _ in range(17):
-        row, col = random.randint(0, 8), random.randint(0, 8)
-        num = random.randint(1, 9)
-        while not is_valid(board, row, col, num) or board[row][col] != 0:
-            row, col = random.randint(0, 8), random.randint(0, 8)
-            num = random.randint(1, 9)
-        board[row][col] = num
-    return board
-
-def measure_performance(algorithm, board):
-    board_copy = [row[:] for row in board]
-    tracemalloc.start()
-    start_snapshot = tracemalloc.take_snapshot()
-    start_time = time.time()
-    
-    success = algorithm(board_copy)
+# Solving runs in a worker thread. The worker records the whole solve as a
+# trace and pushes (solve_id, kind, payload) messages into solve_queue, which
+# the Tk thread drains once per frame; the id lets the UI drop messages from a
+# solve it has already abandoned. The trace is then replayed frame by frame at
+# the speed of the slider, without solving a second time.
+FRAME_MS = 1000 // 30
+solve_queue = queue.Queue()
+solve_id = 0
+cancel_event = threading.Event()
+solver_thread = None
+replay = None  # (name, trace, stats) being replayed
+replay_pos = 0
+replay_job = None
 
-    end_time = time.time()
-    end_snapshot = tracemalloc.take_snapshot()
-    memory_stats = end_snapshot.compare_to(start_snapshot, 'lineno')
-    memory_used = sum(stat.size_diff for stat in memory_stats) / 1024  # KB
+def draw_steps(changes):
+    for (row, col), num in changes.items():
+        idx = row * size + col
+        values[idx] = num
+        colors[idx] = SOLVER_FG
+        dirty.add(idx)
+        dirty.update(tracker.set(idx, num))
+    schedule_render()
 
-    tracemalloc.stop()
-    execution_time = end_time - start_time
-    return execution_time, memory_used, success
+def solve_worker(my_id, name, algorithm, board, cancel):
+    try:
+        stats = SolverStats()
+        trace = record(algorithm, board, cancel, stats)
+        solve_queue.put((my_id, 'done', (name, trace, stats)))
+    except SolveCancelled:
+        solve_queue.put((my_id, 'cancelled', name))
 
+def drain_queue():
+    try:
+        msg_id, kind, payload = solve_queue.get_nowait()
+    except queue.Empty:
+        if solver_thread.is_alive() or not solve_queue.empty():
+            root.after(FRAME_MS, drain_queue)
+        return
+    if msg_id != solve_id:
+        root.after(FRAME_MS, drain_queue)
+        return
+    if kind == 'cancelled':
+        status_label.config(text=f"{payload} stopped.")
+        return
+    name, trace, stats = payload
+    if not trace.solved:
+        status_label.config(text=f"{name} found no solution.")
+        messagebox.showerror("Error", f"AI {name} could not solve the Sudoku.")
+        return
+    start_replay(name, trace, stats)
 
-def solve_with_dfs():
-    global board, entries
-    dfs_time, dfs_memory, dfs_success = measure_performance(dfs_solve, board)
-    
-    solved_board = [row[:] for row in board]
-    if dfs_success:
-        dfs_solve(solved_board)
+def start_replay(name, trace, stats):
+    global replay, replay_pos
+    replay, replay_pos = (name, trace, stats), 0
+    trace_slider.config(to=len(trace))
+    trace_var.set(0)
+    status_label.config(text=f"{name} solved the puzzle in {trace.elapsed:.4f}s ({len(trace)} steps). Replaying...")
+    replay_frame()
+
+def replay_frame():
+    global replay_job
+    # The slider goes from about 30 to a million steps per second.
+    steps = max(1, int(10 ** (1 + 5 * speed_var.get()) * FRAME_MS / 1000))
+    seek_trace(replay_pos + steps)
+    if replay_pos < len(replay[1]):
+        replay_job = root.after(FRAME_MS, replay_frame)
     else:
-        messagebox.showerror("Error", "AI DFS could not solve the Sudoku.")
+        replay_job = None
+        name, trace, stats = replay
+        status_label.config(text=f"{name} solved the puzzle.")
+        messagebox.showinfo("Performance", f"{name}: {trace.elapsed:.4f}s, {len(trace)} steps\n{stats}")
+
+def seek_trace(step):
+    global replay_pos
+    if replay is None:
         return
-    
-    messagebox.showinfo("Performance", f"DFS: {dfs_time:.4f}s, {dfs_memory:.2f}KB")
+    step = max(0, min(int(float(step)), len(replay[1])))
+    draw_steps(replay[1].changes(replay_pos, step))
+    replay_pos = step
+    trace_var.set(step)
 
-def solve_with_heuristic():
-    global board, entries
-    heuristic_time, heuristic_memory, heuristic_success = measure_performance(heuristic_solve, board)
-    
-    solved_board = [row[:] for row in board]
-    if heuristic_success:
-        heuristic_solve(solved_board)
-    else:
-        messagebox.showerror("Error", "AI Heuristic could not solve the Sudoku.")
+def skip_to_end():
+    if replay is not None:
+        seek_trace(len(replay[1]))
+
+def stop_replay():
+    global replay, replay_job
+    if replay_job is not None:
+        root.after_cancel(replay_job)
+        replay_job = None
+    replay = None
+
+def solve_in_background(name, algorithm):
+    global solve_id, cancel_event, solver_thread
+    # Nothing to solve while New Game is still waiting for its puzzle.
+    if pending_game is not None or solver_thread is not None and solver_thread.is_alive():
         return
-    
-    messagebox.showinfo("Performance", f"Heuristic: {heuristic_time:.4f}s, {heuristic_memory:.2f}KB")
+    stop_replay()
+    solve_id += 1
+    cancel_event = threading.Event()
+    solver_thread = threading.Thread(target=solve_worker, daemon=True,
+                                     args=(solve_id, name, algorithm, [row[:] for row in board], cancel_event))
+    solver_thread.start()
+    status_label.config(text=f"Solving with {name}...")
+    root.after(FRAME_MS, drain_queue)
+
+def stop_solving():
+    global solve_id
+    cancel_event.set()
+    if solver_thread is not None and solver_thread.is_alive():
+        # Ignore whatever the old worker still has in flight.
+        solve_id += 1
+        status_label.config(text="Solving stopped.")
+    elif replay_job is not None:
+        status_label.config(text="Replay stopped.")
+    stop_replay()
+
+def solve_with_dfs():
+    solve_in_background("DFS", dfs_solve)
+
+def solve_with_heuristic():
+    solve_in_background("Heuristic", heuristic_solve)
+
+def solve_with_dlx():
+    solve_in_background("DLX", dlx_solve)
+
+def solve_with_propagation():
+    solve_in_background("Propagation", propagation_solve)
 
 def check_solution():
-    for row in range(9):
-        for col in range(9):
-            num = entries[row][col].get()
-            if not num.isdigit() or not (1 <= int(num) <= 9):
-                messagebox.showerror("Error", "Invalid input! Only numbers 1-9 are allowed.")
-                return
-            board[row][col] = int(num)
-    
-    if heuristic_solve([row[:] for row in board]) or dfs_solve([row[:] for row in board]):
+    # The tracker already knows how many cells are filled and whether any
+    # digit repeats, so no search is needed.
+    if tracker.is_complete():
         messagebox.showinfo("Success", "Congratulations! You solved the Sudoku!")
+    elif tracker.filled < size * size:
+        messagebox.showerror("Error", f"Invalid input! Fill every cell with a number 1-{size}.")
     else:
         messagebox.showerror("Error", "Incorrect solution. Try again!")
 
+# New Game takes a ready puzzle from the pool. When there is none yet the
+# Tk thread asks again every frame instead of generating one itself, so the
+# window keeps responding; the old board stays up until the new one arrives.
+pending_game = None  # (difficulty, box) New Game is waiting for
+game_job = None
+
 def new_game():
-    global board, original_board
-    board = generate_board()
+    global pending_game
+    stop_solving()
+    pending_game = (difficulty_var.get(), size_var.get())
+    if game_job is None:
+        start_game()
+
+def start_game():
+    global board, original_board, pending_game, game_job
+    game_job = None
+    difficulty, box = pending_game
+    puzzle = puzzle_pool.get(difficulty, box)
+    if puzzle is None:
+        status_label.config(text=f"Generating a {BOARD_SIZES[box]} {difficulty} puzzle...")
+        game_job = root.after(FRAME_MS, start_game)
+        return
+    pending_game = None
+    if size != box * box:
+        build_grid(box)
+    board = puzzle
     original_board = [row[:] for row in board]
-    for i in range(9):
-        for j in range(9):
-            entries[i][j].config(state='normal')
-            entries[i][j].delete(0, tk.END)
-            if board[i][j] != 0:
-                entries[i][j].insert(0, str(board[i][j]))
-                entries[i][j].config(state='disabled')
+    load_board(board)
+    status_label.config(text="New game started.")
 
 def create_ui():
-    global root, entries, board, difficulty_var, speed_var
+    global root, canvas, board, difficulty_var, size_var, speed_var, trace_var, trace_slider, status_label
+    global puzzle_pool
     root = tk.Tk()
+    # Puzzles are generated ahead of time, so New Game rarely has to wait for one.
+    puzzle_pool = PuzzlePool(boxes=(3,)).start()
     root.title("Sudoku Game")
 
-    # Sudoku grid
-    board_frame = tk.Frame(root)
-    board_frame.grid(row=0, column=0, padx=10, pady=10)
-    entries = []
-    for i in range(9):
-        row_entries = []
-        for j in range(9):
-            entry = tk.Entry(board_frame, width=3, font=('Arial', 18), justify='center')
-            entry.grid(row=i, column=j, padx=2, pady=2)
-            row_entries.append(entry)
-        entries.append(row_entries)
+    # Sudoku grid: click a cell, then type a number; Backspace clears it
+    canvas = tk.Canvas(root, highlightthickness=0, bg="white")
+    canvas.grid(row=0, column=0, padx=10, pady=10)
+    canvas.bind('<Button-1>', on_click)
+    canvas.bind('<Key>', on_key)
+    build_grid(3)
 
     # Sidebar
     control_frame = tk.Frame(root)
@@ -205,6 +329,13 @@ def create_ui():
     difficulty_var = tk.StringVar(value="Medium")
     for level in ["Easy", "Medium", "Hard", "Expert"]:
         tk.Radiobutton(control_frame, text=level, variable=difficulty_var, value=level).pack(anchor='w')
+
+    # Board size, applied by the next New Game
+    tk.Label(control_frame, text="Board Size").pack(anchor='w')
+    size_var = tk.IntVar(value=3)
+    for box, label in BOARD_SIZES.items():
+        tk.Radiobutton(control_frame, text=label, variable=size_var, value=box,
+                       command=lambda box=box: puzzle_pool.warm(box)).pack(anchor='w')
     
     # Animation speed
     speed_label = tk.Label(control_frame, text="Animation Speed")
@@ -213,12 +344,22 @@ def create_ui():
     speed_slider = ttk.Scale(control_frame, from_=0.1, to=1.0, variable=speed_var, orient='horizontal')
     speed_slider.pack(fill='x')
 
+    # Position in the replayed solver trace
+    tk.Label(control_frame, text="Replay Position").pack(anchor='w')
+    trace_var = tk.DoubleVar(value=0)
+    trace_slider = ttk.Scale(control_frame, from_=0, to=1, variable=trace_var, orient='horizontal',
+                             command=seek_trace)
+    trace_slider.pack(fill='x')
+
     # Control buttons
     tk.Button(control_frame, text="New Game",command= new_game, width=20).pack(pady=5)
     tk.Button(control_frame, text="Reset Game",command=reset_game, width=20).pack(pady=5)
     tk.Button(control_frame, text="Check Solution",command=check_solution, width=20).pack(pady=5)
     tk.Button(control_frame, text="Solve with Heuristic",command=solve_with_heuristic, width=20).pack(pady=5)
     tk.Button(control_frame, text="Solve with DFS",command=solve_with_dfs, width=20).pack(pady=5)
+    tk.Button(control_frame, text="Solve with DLX",command=solve_with_dlx, width=20).pack(pady=5)
+    tk.Button(control_frame, text="Solve with Propagation",command=solve_with_propagation, width=20).pack(pady=5)
+    tk.Button(control_frame, text="Skip to End", command=skip_to_end, width=20).pack(pady=5)
     tk.Button(control_frame, text="Stop Solving", command=stop_solving, width=20).pack(pady=5)
     
     # Status bar
@@ -0,0 +1,150 @@
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+from functools import partial
+from multiprocessing import Pool
+
+from sudoku_solver import SOLVERS, parse_puzzle, format_board, propagation_solve
+
+# Batch mode: stream puzzles in the one-line 81-character format through a
+# pool of solver processes and write "puzzle,solution,milliseconds" lines in
+# input order. Only a bounded window of chunks is ever in flight, so memory
+# stays flat no matter how large the input file is.
+#
+#   python sudoku_batch.py puzzles.txt solutions.txt --engine dlx --workers 8
+#
+# Lines of 256 or 625 characters are 16x16 and 25x25 puzzles. The
+# 'vectorized' engine solves each chunk of 9x9 puzzles as one array and works
+# best with large chunks, e.g. --chunk-size 4096; other sizes in the chunk go
+# through the propagation solver. It is the only engine that needs NumPy,
+# which is an optional dependency (pip install numpy); everything else runs
+# on the standard library alone.
+#
+# With --cache FILE every worker answers repeated and isomorphic puzzles from
+# a shared SQLite solution cache (see sudoku_cache.py) before solving.
+
+
+def solve_line(solver, line):
+    start = time.perf_counter()
+    try:
+        board = parse_puzzle(line)
+        solution = format_board(board) if solver(board) else '-'
+    except ValueError:
+        solution = '-'
+    return solution, (time.perf_counter() - start) * 1000
+
+
+_caches = {}
+
+
+def solve_chunk(engine, lines, cache_path=None):
+    if engine == 'vectorized':
+        return solve_chunk_vectorized(lines)
+    solver = SOLVERS[engine]
+    if not cache_path:
+        return [solve_line(solver, line) for line in lines]
+    # One cache per worker process, kept open across chunks.
+    from sudoku_cache import SolutionCache
+
+    if cache_path not in _caches:
+        _caches[cache_path] = SolutionCache(cache_path)
+    cache = _caches[cache_path]
+    results = [solve_line(partial(cache.solve, solver=solver), line) for line in lines]
+    cache.flush()
+    return results
+
+
+def solve_chunk_vectorized(lines):
+    # NumPy is only needed for this engine, so import it in the worker.
+    from sudoku_vectorized import solve_batch
+
+    start = time.perf_counter()
+    boards, positions = [], []
+    results = ['-'] * len(lines)
+    for k, line in enumerate(lines):
+        try:
+            board = parse_puzzle(line)
+        except ValueError:
+            continue
+        if len(board) == 9:
+            boards.append(board)
+            positions.append(k)
+        elif propagation_solve(board):
+            results[k] = format_board(board)
+    if boards:
+        solutions, solved = solve_batch(boards)
+        for k, board, ok in zip(positions, solutions.tolist(), solved):
+            if ok:
+                results[k] = format_board(board)
+    # The chunk is solved as a whole, so report its time spread over every puzzle.
+    elapsed = (time.perf_counter() - start) * 1000 / len(lines)
+    return [(solution, elapsed) for solution in results]
+
+
+def read_puzzles(stream):
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+
+def solve_stream(lines, out, engine='propagation', workers=None, chunk_size=256, cache_path=None):
+    workers = workers or os.cpu_count() or 1
+    lines = iter(lines)
+    total = solved = 0
+    with Pool(workers) as pool:
+        in_flight = deque()
+
+        def submit():
+            chunk = list(islice(lines, chunk_size))
+            if chunk:
+                in_flight.append((chunk, pool.apply_async(solve_chunk, (engine, chunk, cache_path))))
+            return bool(chunk)
+
+        # Two chunks per worker keeps everyone busy while the parent writes.
+        while len(in_flight) < 2 * workers and submit():
+            pass
+        while in_flight:
+            chunk, result = in_flight.popleft()
+            for puzzle, (solution, elapsed) in zip(chunk, result.get()):
+                out.write(f"{puzzle},{solution},{elapsed:.3f}\n")
+                total += 1
+                solved += solution != '-'
+            submit()
+    return total, solved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a file of one-line Sudoku puzzles.")
+    parser.add_argument('input', help="puzzle file, one 81-character grid per line ('-' for stdin)")
+    parser.add_argument('output', help="result file ('-' for stdout)")
+    parser.add_argument('--engine', choices=sorted(SOLVERS) + ['vectorized'], default='propagation')
+    parser.add_argument('--workers', type=int, default=None, help="solver processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=256, help="puzzles sent to a worker at a time")
+    parser.add_argument('--cache', help="SQLite solution cache to read and extend (not used by 'vectorized')")
+    args = parser.parse_args(argv)
+    if args.engine == 'vectorized' and importlib.util.find_spec('numpy') is None:
+        parser.error("--engine vectorized needs NumPy (pip install numpy)")
+
+    src = sys.stdin if args.input == '-' else open(args.input)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    start = time.perf_counter()
+    try:
+        total, solved = solve_stream(read_puzzles(src), out, args.engine, args.workers, args.chunk_size,
+                                     args.cache)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed else 0.0
+    print(f"{solved}/{total} solved in {elapsed:.2f}s ({rate:.0f} puzzles/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from sudoku_solver import SOLVERS, SolverStats, parse_puzzle
+from sudoku_trace import record
+
+# Benchmark suite for the Sudoku engines. Every (solver, puzzle) pair gets
+# three separate passes so that no measurement pays for another one:
+#   1. warm-up runs, then repeated samples timed with perf_counter, each
+#      a loop of solves lasting at least MIN_SAMPLE_S, taken round the corpus
+#   2. one run under tracemalloc for the peak memory
+#   3. one recorded run with a SolverStats (nodes, backtracks, eliminations,
+#      depth, branching per depth, time per phase), whose trace is kept on disk
+#      with --trace-dir for replaying in the UI
+# Results are written as one JSON file per solver, which can be diffed
+# against an earlier run with --baseline.
+#
+#   python sudoku_bench.py --solvers dlx propagation --repeats 10 --output-dir bench/ --trace-dir bench/traces
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'sudoku_corpus.txt')
+LEVELS = ['Easy', 'Medium', 'Hard', 'Expert', 'Extreme']
+# A timing sample runs the solver back to back until it has lasted this long,
+# so sub-millisecond solves are not lost in timer and scheduler noise.
+MIN_SAMPLE_S = 0.05
+# compare() only reports a slowdown that is also this many stdevs of either run.
+NOISE_STDEVS = 3
+
+
+def load_corpus(path=CORPUS_PATH):
+    """Read "<level> <81-character puzzle>" lines into a list of (level, puzzle) pairs."""
+    corpus = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                level, puzzle = line.split()
+                corpus.append((level, puzzle))
+    return corpus
+
+
+def _time_loops(solver, board, loops):
+    # The copies are made up front so that only the solves are timed.
+    copies = [[row[:] for row in board] for _ in range(loops)]
+    start = time.perf_counter()
+    for board_copy in copies:
+        success = solver(board_copy)
+    return success, time.perf_counter() - start
+
+
+def time_solvers(solver, boards, repeats=5, warmup=1):
+    """Return (success, seconds per solve in each of `repeats` samples, solves per sample) per board.
+
+    Like timeit's autorange(), the number of solves per sample grows until
+    one sample lasts at least MIN_SAMPLE_S. The samples go round the boards
+    `repeats` times rather than one board at a time, so a slow spell of the
+    machine costs every board at most a sample instead of all of a few.
+    """
+    runs = []
+    for board in boards:
+        for _ in range(warmup):
+            solver([row[:] for row in board])
+        loops = 1
+        while True:
+            success, elapsed = _time_loops(solver, board, loops)
+            if elapsed >= MIN_SAMPLE_S:
+                break
+            loops = max(2 * loops, int(loops * 1.2 * MIN_SAMPLE_S / elapsed) if elapsed else 0)
+        runs.append((success, [], loops))
+    for _ in range(repeats):
+        for board, (_, times, loops) in zip(boards, runs):
+            times.append(_time_loops(solver, board, loops)[1] / loops)
+    return runs
+
+
+def peak_memory(solver, board):
+    board_copy = [row[:] for row in board]
+    tracemalloc.start()
+    try:
+        solver(board_copy)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024  # KB
+
+
+def benchmark_solver(name, corpus, repeats=5, warmup=1, trace_dir=None):
+    solver = SOLVERS[name]
+    results = []
+    boards = [parse_puzzle(puzzle) for _, puzzle in corpus]
+    runs = time_solvers(solver, boards, repeats, warmup)
+    for k, ((level, puzzle), board, (success, times, loops)) in enumerate(zip(corpus, boards, runs)):
+        stats = SolverStats()
+        trace = record(solver, board, stats=stats)
+        if trace_dir:
+            trace.save(os.path.join(trace_dir, f'{name}_{k}.trace'))
+        results.append({
+            'id': k,
+            'level': level,
+            'puzzle': puzzle,
+            'solved': success,
+            'loops': loops,
+            'min_s': min(times),
+            'median_s': statistics.median(times),
+            'mean_s': statistics.fmean(times),
+            'stdev_s': statistics.stdev(times) if len(times) > 1 else 0.0,
+            'peak_kb': peak_memory(solver, board),
+            'nodes': stats.nodes,
+            'backtracks': stats.backtracks,
+            'trace_bytes': len(trace.to_bytes()),
+            'stats': stats.as_dict(),
+        })
+    summary = {}
+    for level in LEVELS:
+        rows = [r for r in results if r['level'] == level]
+        if rows:
+            summary[level] = {
+                'puzzles': len(rows),
+                'median_s': statistics.median(r['median_s'] for r in rows),
+                'max_s': max(r['median_s'] for r in rows),
+                'nodes': sum(r['nodes'] for r in rows),
+            }
+    return {
+        'solver': name,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeats': repeats,
+        'warmup': warmup,
+        'summary': summary,
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=1.10):
+    """Return (puzzle id, level, ratio) for puzzles whose best time grew by more than `threshold`.
+
+    A growth within NOISE_STDEVS standard deviations of either run's samples
+    is taken for noise and not reported.
+    """
+    before = {r['puzzle']: r for r in baseline['results']}
+    slower = []
+    for r in current['results']:
+        old = before.get(r['puzzle'])
+        # The minimum is the least noisy of the repeated timings.
+        if old and old['min_s'] > 0:
+            ratio = r['min_s'] / old['min_s']
+            noise = NOISE_STDEVS * max(r['stdev_s'], old['stdev_s'])
+            if ratio > threshold and r['min_s'] - old['min_s'] > noise:
+                slower.append((r['id'], r['level'], ratio))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Sudoku solvers on a puzzle corpus.")
+    parser.add_argument('--solvers', nargs='+', choices=sorted(SOLVERS), default=sorted(SOLVERS))
+    parser.add_argument('--levels', nargs='+', choices=LEVELS, default=LEVELS)
+    parser.add_argument('--corpus', default=CORPUS_PATH, help="file of '<level> <puzzle>' lines")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--output-dir', default='.', help="where bench_<solver>.json files are written")
+    parser.add_argument('--baseline', help="directory with an earlier run to compare against")
+    parser.add_argument('--trace-dir', help="also save every solve as <solver>_<id>.trace here")
+    args = parser.parse_args(argv)
+
+    corpus = [(level, puzzle) for level, puzzle in load_corpus(args.corpus) if level in args.levels]
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.trace_dir:
+        os.makedirs(args.trace_dir, exist_ok=True)
+    regressions = 0
+    for name in args.solvers:
+        report = benchmark_solver(name, corpus, args.repeats, args.warmup, args.trace_dir)
+        with open(os.path.join(args.output_dir, f'bench_{name}.json'), 'w') as f:
+            json.dump(report, f, indent=2)
+
+        print(f"{name}:")
+        for level, row in report['summary'].items():
+            print(f"  {level:8} {row['puzzles']:3} puzzles  median {row['median_s'] * 1000:9.3f} ms"
+                  f"  max {row['max_s'] * 1000:9.3f} ms  nodes {row['nodes']}")
+
+        baseline_path = args.baseline and os.path.join(args.baseline, f'bench_{name}.json')
+        if baseline_path and os.path.exists(baseline_path):
+            with open(baseline_path) as f:
+                slower = compare(json.load(f), report)
+            regressions += len(slower)
+            for k, level, ratio in slower:
+                print(f"  slower: puzzle {k} ({level}) x{ratio:.2f}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,239 @@
+import sqlite3
+from collections import OrderedDict
+from itertools import permutations, product
+
+from sudoku_solver import propagation_solve, parse_puzzle, format_board
+
+# Solution cache keyed by canonical form. Relabeling the digits, swapping
+# bands or stacks, swapping rows inside a band or columns inside a stack and
+# transposing all map a puzzle onto an equivalent one, and the solution maps
+# the same way. A 9x9 puzzle is reduced to the smallest of its 3,359,232
+# equivalent grids:
+#   1. the clue pattern alone is minimized (row masks, read as binary with the
+#      first column as the top bit), which only depends on the row and column
+#      order and is cheap to compare. It is minimized a stack at a time: the
+#      pattern of the first three columns, then of the first six, then of all
+#      nine, so only the column orders that tie at each step go on;
+#   2. among the transforms giving that pattern, the digits are relabeled in
+#      order of first appearance and the smallest string wins.
+# Cached solutions are stored in canonical coordinates and mapped back through
+# the puzzle's own transform, so every isomorphic puzzle shares one entry.
+# Other board sizes are cached by their exact string only.
+#
+#   cache = SolutionCache('solutions.sqlite')
+#   cache.solve(board)      # like propagation_solve, but answered from the cache when it can
+BAND_PERMS = list(permutations(range(3)))
+# Ties between equal row masks multiply the transforms left for step 2; past
+# this many the first ones are kept, which can only cost a missed cache hit.
+MAX_CANDIDATES = 2048
+
+
+def _pattern(masks):
+    return sorted(sorted(masks[3 * b:3 * b + 3]) for b in range(3))
+
+
+def _best_columns(grid):
+    # The column orders (new column -> old column) that keep the stacks
+    # intact and give the smallest clue pattern, each with its row masks.
+    # Patterns are compared one stack at a time from the left (see step 1),
+    # so an order is only followed while it ties for the smallest so far:
+    # about 40 orders get looked at instead of 1296.
+    bits = {}
+    for stack in range(3):
+        for inner in BAND_PERMS:
+            a, b, c = (3 * stack + i for i in inner)
+            bits[a, b, c] = [bool(row[a]) << 2 | bool(row[b]) << 1 | bool(row[c]) for row in grid]
+    front = [((), [0] * 9)]
+    for _ in range(3):
+        best, grown = None, []
+        for cols, masks in front:
+            for step, add in bits.items():
+                if step[0] // 3 * 3 in cols:
+                    continue
+                moved = [m << 3 | v for m, v in zip(masks, add)]
+                key = _pattern(moved)
+                if best is None or key < best:
+                    best, grown = key, [(cols + step, moved)]
+                elif key == best:
+                    grown.append((cols + step, moved))
+        front = grown
+    return best, front
+
+
+def _tied_orders(values):
+    # All orders of `values` (new position -> old index) that sort them ascending.
+    groups = {}
+    for k in sorted(range(len(values)), key=values.__getitem__):
+        groups.setdefault(values[k], []).append(k)
+    runs = [list(permutations(groups[v])) for v in sorted(groups)]
+    return [sum(choice, ()) for choice in product(*runs)]
+
+
+def _row_orders(masks):
+    bands = [tuple(sorted(masks[3 * b:3 * b + 3])) for b in range(3)]
+    inner = [_tied_orders(masks[3 * b:3 * b + 3]) for b in range(3)]
+    for band_order in _tied_orders(bands):
+        for choice in product(*(inner[b] for b in band_order)):
+            yield [3 * b + i for b, rows in zip(band_order, choice) for i in rows]
+
+
+def canonical_form(board):
+    """Return (key, transform) for a 9x9 board.
+
+    `key` is the canonical puzzle as an 81-character string and `transform` is
+    (transposed, rows, cols, relabel): canonical cell (i, j) holds
+    relabel[grid[rows[i]][cols[j]]], where grid is the board, transposed first
+    if asked.
+    """
+    grids = (board, [list(col) for col in zip(*board)])
+
+    # Step 1: the smallest clue pattern and every (transpose, columns) reaching it.
+    best, ties = None, []
+    for t, grid in enumerate(grids):
+        key, found = _best_columns(grid)
+        if best is None or key < best:
+            best, ties = key, []
+        if key == best:
+            ties.extend((t, cols, moved) for cols, moved in found)
+
+    # Step 2: relabel the digits for every transform with that pattern.
+    best_key, best_transform, tried = None, None, 0
+    for t, cols, moved in ties:
+        grid = grids[t]
+        for rows in _row_orders(moved):
+            tried += 1
+            if tried > MAX_CANDIDATES:
+                break
+            relabel, label, key = [0] * 10, 0, []
+            for i in range(9):
+                row = grid[rows[i]]
+                for j in range(9):
+                    num = row[cols[j]]
+                    if num and not relabel[num]:
+                        label += 1
+                        relabel[num] = label
+                    key.append(relabel[num])
+            if best_key is None or key < best_key:
+                best_key, best_transform = key, (t, rows, cols, relabel)
+    t, rows, cols, relabel = best_transform
+    # Digits missing from the clues take the remaining labels in order.
+    spare = iter(d for d in range(1, 10) if d not in relabel)
+    relabel = [0] + [relabel[d] or next(spare) for d in range(1, 10)]
+    return format_board([best_key[r * 9:r * 9 + 9] for r in range(9)]), (t, rows, cols, relabel)
+
+
+def transform_board(board, transform):
+    """Map a board (e.g. a solution) of the original puzzle into canonical form."""
+    t, rows, cols, relabel = transform
+    grid = [list(col) for col in zip(*board)] if t else board
+    return [[relabel[grid[rows[i]][cols[j]]] for j in range(9)] for i in range(9)]
+
+
+def restore_board(canonical, transform):
+    """Map a canonical board back onto the original puzzle; inverse of transform_board."""
+    t, rows, cols, relabel = transform
+    unlabel = [0] * 10
+    for d in range(1, 10):
+        unlabel[relabel[d]] = d
+    grid = [[0] * 9 for _ in range(9)]
+    for i in range(9):
+        for j in range(9):
+            grid[rows[i]][cols[j]] = unlabel[canonical[i][j]]
+    return [list(col) for col in zip(*grid)] if t else grid
+
+
+class SolutionCache:
+    """LRU map from puzzle string to solution string ('-' when there is none).
+
+    Keys are raw puzzles and canonical forms alike. With a `path`, canonical
+    entries are also kept in an SQLite file, which several processes may
+    share; call flush() (or close()) to commit new entries.
+    """
+
+    def __init__(self, path=None, maxsize=4096):
+        self.maxsize = maxsize
+        self.memory = OrderedDict()
+        self.hits = self.canonical_hits = self.misses = 0
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, timeout=30)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('CREATE TABLE IF NOT EXISTS solutions (puzzle TEXT PRIMARY KEY, solution TEXT NOT NULL)')
+
+    def _get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory.move_to_end(key)
+        elif self.db is not None:
+            row = self.db.execute('SELECT solution FROM solutions WHERE puzzle = ?', (key,)).fetchone()
+            if row:
+                value = row[0]
+                self._remember(key, value)
+        return value
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    def _put(self, key, value):
+        self._remember(key, value)
+        if self.db is not None:
+            self.db.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?)', (key, value))
+
+    def solve(self, board, solver=propagation_solve):
+        """Fill `board` in place like the solvers do; returns False when it has no solution."""
+        raw = format_board(board)
+        value = self.memory.get(raw)
+        if value is not None:
+            self.memory.move_to_end(raw)
+            self.hits += 1
+        elif len(board) != 9:
+            value = self._get(raw)
+            if value is None:
+                value = self._solve(board, solver)
+                self._put(raw, value)
+                self.misses += 1
+            else:
+                self.hits += 1
+        else:
+            key, transform = canonical_form(board)
+            value = self._get(key)
+            if value is None:
+                value = self._solve(board, solver)
+                self._put(key, value if value == '-' else
+                          format_board(transform_board(parse_puzzle(value), transform)))
+                self.misses += 1
+            else:
+                if value != '-':
+                    value = format_board(restore_board(parse_puzzle(value), transform))
+                self.canonical_hits += 1
+            self._remember(raw, value)
+        if value == '-':
+            return False
+        solution = parse_puzzle(value)
+        for r, row in enumerate(solution):
+            board[r][:] = row
+        return True
+
+    @staticmethod
+    def _solve(board, solver):
+        grid = [row[:] for row in board]
+        return format_board(grid) if solver(grid) else '-'
+
+    def flush(self):
+        if self.db is not None:
+            self.db.commit()
+
+    def close(self):
+        if self.db is not None:
+            self.db.commit()
+            self.db.close()
+            self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,279 @@
+import random
+import threading
+from collections import deque
+
+from sudoku_solver import (BitBoard, Search, SINGLES, INTERSECTIONS, PAIRS, box_size, geometry, propagate,
+                           heuristic_solve, propagation_solve, count_solutions)
+
+# Puzzle generation: start from a random full grid and dig clues out while the
+# puzzle keeps exactly one solution, then grade it by the hardest technique
+# a solver needs. `box` picks the board: 3 for 9x9, 4 for 16x16, 5 for 25x25.
+# In bulk, every dug puzzle is also dealt out as shuffled look-alikes.
+DIFFICULTIES = ['Easy', 'Medium', 'Hard', 'Expert']
+EASY, MEDIUM, HARD, EXPERT = SINGLES, INTERSECTIONS, PAIRS, PAIRS + 1
+# Look-alikes generate_puzzles() deals from every dug puzzle.
+SHUFFLES = 63
+
+
+def random_grid(rng=random, box=3):
+    geo = geometry(box)
+    size = geo.size
+    board = [[0] * size for _ in range(size)]
+    # The diagonal boxes never see each other, so they can be shuffled freely.
+    for b in range(0, size, box + 1):
+        digits = rng.sample(range(1, size + 1), size)
+        for k, idx in enumerate(geo.units[2 * size + b]):
+            board[idx // size][idx % size] = digits[k]
+    # Backtracking fills a 9x9 grid in well under a millisecond but can stall
+    # for minutes on 16x16 and 25x25, where propagation stays near a second.
+    (heuristic_solve if box == 3 else propagation_solve)(board)
+    return board
+
+
+def grade_puzzle(board, max_level=EXPERT):
+    """Return the level (EASY..EXPERT) of the hardest technique `board` needs.
+
+    Returns 0 when the puzzle does not have exactly one solution, or when it
+    needs more than `max_level`.
+    """
+    try:
+        state = BitBoard(board)
+    except ValueError:
+        return 0
+    for level in (SINGLES, INTERSECTIONS, PAIRS):
+        if level > max_level or not propagate(state, level=level):
+            return 0
+        if 0 not in state.cells:
+            return level
+    if max_level < EXPERT:
+        return 0
+    return EXPERT if count_solutions(board, 2) == 1 else 0
+
+
+def _dig_singles(board, rng):
+    # Remove a clue only when the remaining clues pin it down as a naked or
+    # hidden single. Every removal is then undone by one deduction, so the
+    # result is unique and solvable with singles alone, without running a solver.
+    geo = geometry(box_size(board))
+    size, full, units = geo.size, geo.full, geo.units
+    row_of, col_of, box_of = geo.row_of, geo.col_of, geo.box_of
+    rows, cols, boxes = [full] * size, [full] * size, [full] * size
+    cells = [board[idx // size][idx % size] for idx in range(geo.cells)]
+    for idx in rng.sample(range(geo.cells), geo.cells):
+        r, c, b = row_of[idx], col_of[idx], box_of[idx]
+        bit = 1 << (cells[idx] - 1)
+        rows[r] ^= bit
+        cols[c] ^= bit
+        boxes[b] ^= bit
+        naked = full & ~(rows[r] | cols[c] | boxes[b]) == bit
+        if naked or any(
+                all(other == idx or cells[other]
+                    or (rows[row_of[other]] | cols[col_of[other]] | boxes[box_of[other]]) & bit
+                    for other in units[unit])
+                for unit in (r, size + c, 2 * size + b)):
+            cells[idx] = 0
+            board[r][c] = 0
+        else:
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+
+
+def _deadly_rectangles(board, box):
+    # Masks of four cells on two rows of one band (or two columns of one
+    # stack) that hold a b / b a. Swapping those digits gives a second
+    # solution, so a unique puzzle keeps a clue in every one of them.
+    size = box * box
+    found = []
+    for lines, cell in ((board, lambda i, j: i * size + j), (list(zip(*board)), lambda i, j: j * size + i)):
+        for i1 in range(size):
+            for i2 in range(i1 + 1, (i1 // box + 1) * box):
+                seen = {}
+                for j, pair in enumerate(zip(lines[i1], lines[i2])):
+                    other = seen.get(pair[::-1])
+                    if other is not None:
+                        found.append(sum(1 << cell(i, k) for i in (i1, i2) for k in (other, j)))
+                    seen[pair] = j
+    return found
+
+
+class _Derived(Exception):
+    pass
+
+
+def _derives(state, idx, level):
+    # Propagate at `level` until cell `idx` gets a digit. The rest of the
+    # board is left half done, so a try costs only the deductions that lead
+    # back to the removed clue.
+    size = state.geo.size
+    row, col = idx // size, idx % size
+
+    def watch(r, c, num):
+        if r == row and c == col:
+            raise _Derived
+
+    try:
+        propagate(state, watch, level)
+    except _Derived:
+        return True
+    return False
+
+
+def generate_puzzle(difficulty='Medium', rng=random, box=3):
+    """Generate a unique-solution puzzle graded at `difficulty` (one of DIFFICULTIES)."""
+    level = DIFFICULTIES.index(difficulty) + 1
+    size = box * box
+    state = BitBoard([[0] * size for _ in range(size)])
+    while True:
+        board = random_grid(rng, box)
+        if level == EASY:
+            _dig_singles(board, rng)
+            return board
+        deadly = _deadly_rectangles(board, box)
+        _dig_singles(board, rng)
+        # Keep digging with the target level's techniques (or a uniqueness
+        # check for Expert) until the puzzle actually needs that level. The
+        # puzzle so far is solved by easier techniques, so it stays that way
+        # without a clue exactly when they put the clue back; otherwise the
+        # same state goes on to the target level. One state serves every try
+        # and is rolled back to an empty board with its trail in between.
+        # Taking the last clue out of a deadly rectangle needs no propagation
+        # to be turned down.
+        clues = [idx for idx in range(size * size) if board[idx // size][idx % size]]
+        given = sum(1 << idx for idx in clues)
+        for idx in rng.sample(clues, len(clues)):
+            if any(not rect & given & ~(1 << idx) for rect in deadly):
+                continue
+            r, c = idx // size, idx % size
+            num, board[r][c] = board[r][c], 0
+            given ^= 1 << idx
+            state.undo_to(0)
+            for other in clues:
+                if board[other // size][other % size]:
+                    state.place(other, board[other // size][other % size])
+            if _derives(state, idx, level - 1):
+                continue
+            if level < EXPERT:
+                found = _derives(state, idx, level)
+            else:
+                # Unique exactly when no solution has another digit there.
+                state.eliminate(idx, 1 << (num - 1))
+                found = not Search(state).run()
+            if found:
+                return board
+            board[r][c] = num
+            given ^= 1 << idx
+
+
+def shuffle_puzzle(board, rng=random):
+    """Return a random look-alike of `board`: same grade, same number of solutions.
+
+    Digits are relabelled, bands and the rows inside each band are permuted,
+    and so are stacks and their columns; half the time the grid is also
+    mirrored on its diagonal. None of that changes which techniques apply.
+    """
+    box = box_size(board)
+    size = box * box
+    label = [0] + rng.sample(range(1, size + 1), size)
+    rows, cols = [
+        [band * box + i for band in rng.sample(range(box), box) for i in rng.sample(range(box), box)]
+        for _ in range(2)]
+    if rng.random() < 0.5:
+        return [[label[board[r][c]] for r in rows] for c in cols]
+    return [[label[board[r][c]] for c in cols] for r in rows]
+
+
+def generate_puzzles(difficulty='Medium', rng=random, box=3, shuffles=SHUFFLES):
+    """Yield graded puzzles without end: each dug puzzle, then `shuffles` look-alikes of it.
+
+    Past Easy, digging takes tens to hundreds of milliseconds a puzzle and a
+    shuffle well under one, so this is the way to make puzzles in bulk.
+    """
+    while True:
+        board = generate_puzzle(difficulty, rng, box)
+        yield board
+        for _ in range(shuffles):
+            yield shuffle_puzzle(board, rng)
+
+
+def generate_board(difficulty='Medium', box=3):
+    return generate_puzzle(difficulty, box=box)
+
+
+class PuzzlePool:
+    """Ready-to-play puzzles for every (difficulty, box), made on a background thread.
+
+    Each queue holds at most `capacity` puzzles. Once a get() leaves fewer
+    than `low_water`, the thread refills that queue up to capacity again,
+    emptiest queue first, and sleeps when everything is full. get() never
+    generates: on a queue that is still empty (e.g. right after switching
+    board size) it returns None and the thread fills that queue next, so
+    the caller can simply ask again a little later.
+
+        pool = PuzzlePool(boxes=(3,)).start()
+        board = pool.get('Expert')  # None until one is ready
+    """
+
+    def __init__(self, capacity=4, low_water=2, boxes=(3,), rng=None):
+        self.capacity = capacity
+        self.low_water = low_water
+        self.rng = rng or random.Random()
+        self.ready = {}
+        self.refill = set()
+        self.urgent = set()
+        self.cond = threading.Condition()
+        self.thread = None
+        self.stopped = False
+        for box in boxes:
+            self.warm(box)
+
+    def warm(self, box):
+        """Start filling the queues of every difficulty for `box`."""
+        with self.cond:
+            for difficulty in DIFFICULTIES:
+                self.ready.setdefault((difficulty, box), deque())
+                self.refill.add((difficulty, box))
+            self.cond.notify()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+
+    def get(self, difficulty='Medium', box=3):
+        key = (difficulty, box)
+        with self.cond:
+            puzzles = self.ready.setdefault(key, deque())
+            board = puzzles.popleft() if puzzles else None
+            if board is None:
+                self.urgent.add(key)
+            if len(puzzles) < self.low_water:
+                self.refill.add(key)
+                self.cond.notify()
+        return board
+
+    def _next(self):
+        # A queue someone is waiting on, else the emptiest one still below
+        # capacity, or None when all are full.
+        for key in [key for key in self.refill if len(self.ready[key]) >= self.capacity]:
+            self.refill.discard(key)
+        return min(self.urgent or self.refill, key=lambda key: len(self.ready[key]), default=None)
+
+    def _run(self):
+        while True:
+            with self.cond:
+                key = self._next()
+                while key is None and not self.stopped:
+                    self.cond.wait()
+                    key = self._next()
+                if self.stopped:
+                    return
+            board = generate_puzzle(key[0], self.rng, key[1])
+            with self.cond:
+                self.ready[key].append(board)
+                self.urgent.discard(key)
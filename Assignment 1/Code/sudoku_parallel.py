@@ -0,0 +1,290 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from multiprocessing import Pipe, Pool, Process
+from multiprocessing.connection import wait
+
+from sudoku_solver import (SOLVERS, BitBoard, Search, propagate, most_constrained,
+                           propagation_solve, count_solutions, parse_puzzle, format_board)
+
+# Split search for the few puzzles that keep a single backtracker busy for
+# seconds. The tree is cut at its first branching cells, level by level, until
+# there are a few subtrees per worker; every subtree is a plain board with the
+# branch digits filled in and is solved by its own process:
+#   parallel_solve  - the first subtree to find a solution wins and the pool is
+#                     terminated, which kills the workers still searching;
+#   parallel_count  - solution counts of the subtrees are added up (stopping at
+#                     `limit`), e.g. to check that a puzzle is unique.
+# Puzzles that the sequential search finishes within `budget` nodes never pay
+# for starting the pool.
+#
+# portfolio_solve races whole engines instead: each of them keeps a warm
+# process of its own, gets the same puzzle over a pipe and the first answer
+# is taken, so the time is that of whichever engine suits the puzzle best
+# plus a pipe round trip.
+#
+#   python sudoku_parallel.py PUZZLE --workers 16 [--count | --portfolio]
+SUBTREES_PER_WORKER = 4
+MAX_SPLIT_DEPTH = 12
+
+
+def split_board(board, parts):
+    """Cut the search tree of `board` into about `parts` disjoint subtrees.
+
+    Returns the subtree boards in the order the sequential search would visit
+    them. Branches that propagation already refutes are dropped, so an empty
+    list means there is no solution.
+    """
+    frontier = [[row[:] for row in board]]
+    for _ in range(MAX_SPLIT_DEPTH):
+        if len(frontier) >= parts:
+            break
+        children, grew = [], False
+        for sub in frontier:
+            try:
+                state = BitBoard(sub)
+            except ValueError:
+                continue
+            if not propagate(state):
+                continue
+            best = most_constrained(state)
+            state.write_to(sub)
+            if best < 0:
+                children.append(sub)
+                continue
+            size = state.geo.size
+            for num in state.geo.digits(state.candidates(best)):
+                child = [row[:] for row in sub]
+                child[best // size][best % size] = num
+                children.append(child)
+            grew = True
+        frontier = children
+        if not grew:
+            break
+    return frontier
+
+
+def _solve_subtree(board):
+    return board if propagation_solve(board) else None
+
+
+def _count_subtree(args):
+    board, limit = args
+    return count_solutions(board, limit)
+
+
+def _engine_worker(name, conn):
+    # One engine in its own process: boards in, (name, solution or None, seconds) out.
+    solver = SOLVERS[name]
+    while True:
+        board = conn.recv()
+        if board is None:
+            return
+        start = time.perf_counter()
+        solved = solver(board)
+        conn.send((name, board if solved else None, time.perf_counter() - start))
+
+
+class Portfolio:
+    """A warm process for every engine in `engines`, raced on each puzzle.
+
+    race() hands the puzzle to every idle engine and returns the first
+    answer. Engines that are still searching are killed and started again on
+    a background thread, so the next race does not wait for them; an engine
+    that is not back yet sits that race out.
+
+        portfolio = Portfolio(['dlx', 'propagation'])
+        winner, solution, seconds = portfolio.race(board)
+    """
+
+    def __init__(self, engines=None):
+        self.engines = list(engines or SOLVERS)
+        self.idle = {}  # name -> (process, conn) of the engines ready for a puzzle
+        self.cond = threading.Condition()
+        for name in self.engines:
+            self._spawn(name)
+
+    def _spawn(self, name):
+        conn, child = Pipe()
+        process = Process(target=_engine_worker, args=(name, child), daemon=True)
+        process.start()
+        child.close()
+        with self.cond:
+            self.idle[name] = (process, conn)
+            self.cond.notify_all()
+
+    def _replace(self, losers):
+        for name, (process, conn) in losers.items():
+            process.terminate()
+            process.join()
+            conn.close()
+            self._spawn(name)
+
+    def race(self, board):
+        """Returns (winner, solution or None, seconds) like the race() function."""
+        with self.cond:
+            while not self.idle:
+                self.cond.wait()
+            racing, self.idle = self.idle, {}
+        for _, conn in racing.values():
+            conn.send(board)
+        result = wait([conn for _, conn in racing.values()])[0].recv()
+        losers = {}
+        with self.cond:
+            for name, (process, conn) in racing.items():
+                if name == result[0]:
+                    self.idle[name] = (process, conn)
+                elif conn.poll():
+                    # Finished too, just later: drop its answer and keep it.
+                    conn.recv()
+                    self.idle[name] = (process, conn)
+                else:
+                    losers[name] = (process, conn)
+            self.cond.notify_all()
+        if losers:
+            threading.Thread(target=self._replace, args=(losers,), daemon=True).start()
+        return result
+
+    def close(self):
+        with self.cond:
+            workers, self.idle = self.idle, {}
+        for process, conn in workers.values():
+            conn.send(None)
+            process.join()
+            conn.close()
+
+
+_portfolios = {}
+
+
+def race(board, engines=None):
+    """Run every engine in `engines` (names in SOLVERS, default all) on `board` at once.
+
+    Returns (winner, solution or None, seconds) for the first engine to
+    finish; the others are killed. A None solution means the puzzle has none.
+    The engine processes stay up between calls, one Portfolio per engine list.
+    """
+    key = tuple(engines or SOLVERS)
+    if key not in _portfolios:
+        _portfolios[key] = Portfolio(key)
+    return _portfolios[key].race(board)
+
+
+def _fill(board, solution, on_step):
+    size = len(board)
+    for r in range(size):
+        for c in range(size):
+            if on_step and not board[r][c]:
+                on_step(r, c, solution[r][c])
+            board[r][c] = solution[r][c]
+
+
+def portfolio_solve(board, on_step=None, engines=None):
+    """Solve `board` in place with whichever of `engines` answers first.
+
+    As with parallel_solve, `on_step` only sees the digits of the solution.
+    """
+    _, solution, _ = race(board, engines)
+    if solution is None:
+        return False
+    _fill(board, solution, on_step)
+    return True
+
+
+def _warm_up(board, budget):
+    # Sequential search for `budget` nodes; the Search, or None for an invalid board.
+    try:
+        search = Search(board)
+    except ValueError:
+        return None
+    search.run(budget)
+    return search
+
+
+def parallel_solve(board, on_step=None, workers=None, budget=2000):
+    """Solve `board` in place like propagation_solve, spreading hard puzzles over processes.
+
+    Steps cannot be streamed from other processes, so `on_step` only sees the
+    digits of the final solution.
+    """
+    search = _warm_up(board, budget)
+    if search is None:
+        return False
+    if search.solved:
+        solution = search.solution()
+    elif search.done:
+        return False
+    else:
+        workers = workers or os.cpu_count() or 1
+        solution = None
+        subtrees = split_board(board, workers * SUBTREES_PER_WORKER)
+        if subtrees:
+            # Leaving the with block terminates the pool, and the losers with it.
+            with Pool(min(workers, len(subtrees))) as pool:
+                for result in pool.imap_unordered(_solve_subtree, subtrees):
+                    if result is not None:
+                        solution = result
+                        break
+        if solution is None:
+            return False
+    _fill(board, solution, on_step)
+    return True
+
+
+def parallel_count(board, limit=2, workers=None, budget=2000):
+    """Count the solutions of `board` over a process pool, stopping once `limit` have been found.
+
+    `limit=None` counts them all.
+    """
+    search = _warm_up(board, budget)
+    if search is None:
+        return 0
+    found = 0
+    while search.solved:
+        found += 1
+        if found == limit:
+            return found
+        search.run(budget)
+    if search.done:
+        return found
+    workers = workers or os.cpu_count() or 1
+    subtrees = split_board(board, workers * SUBTREES_PER_WORKER)
+    if not subtrees:
+        return 0
+    total = 0
+    with Pool(min(workers, len(subtrees))) as pool:
+        for count in pool.imap_unordered(_count_subtree, [(sub, limit) for sub in subtrees]):
+            total += count
+            if limit is not None and total >= limit:
+                return limit
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve one hard Sudoku puzzle on several processes.")
+    parser.add_argument('puzzle', help="one-line puzzle (16, 81, 256 or 625 characters)")
+    parser.add_argument('--workers', type=int, default=None, help="solver processes (default: CPU count)")
+    parser.add_argument('--count', action='store_true', help="count solutions (up to --limit) instead of solving")
+    parser.add_argument('--limit', type=int, default=2, help="stop counting here, 0 for no limit")
+    parser.add_argument('--portfolio', nargs='*', choices=sorted(SOLVERS), metavar='ENGINE',
+                        help="race these engines (default: all) instead of splitting one search")
+    args = parser.parse_args(argv)
+
+    board = parse_puzzle(args.puzzle)
+    start = time.perf_counter()
+    if args.count:
+        result = parallel_count(board, args.limit or None, args.workers)
+    elif args.portfolio is not None:
+        winner, solution, elapsed = race(board, args.portfolio)
+        print(f"{winner} answered first in {elapsed:.3f}s", file=sys.stderr)
+        result = format_board(solution) if solution else '-'
+    else:
+        result = format_board(board) if parallel_solve(board, workers=args.workers) else '-'
+    print(result)
+    print(f"{time.perf_counter() - start:.3f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
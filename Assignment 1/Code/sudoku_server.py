@@ -0,0 +1,281 @@
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from multiprocessing import Pool
+from socketserver import ThreadingMixIn, UnixStreamServer
+
+from sudoku_solver import SOLVERS, DLX_TEMPLATES, SolverStats, build_dlx, parse_puzzle, format_board
+
+# Local solving service, so other tools can use the engines without Tkinter.
+# Puzzles arrive as JSON over HTTP on localhost (or on a Unix socket); every
+# request waits on a Future while a dispatcher thread gathers whatever came in
+# during the last few milliseconds into one batch per engine and hands it to
+# a pool of solver processes that stays up for the life of the server.
+#
+#   python sudoku_server.py --port 8765 --workers 8
+#   curl -d '{"puzzle": "53..7....6..195....", "engine": "dlx"}' localhost:8765/solve
+#   curl localhost:8765/stats
+#
+# POST /solve takes {"puzzle": "..."} or {"puzzles": [...]}, with an optional
+# "engine" (default propagation), and answers with the solution ('-' when there
+# is none), the solver's SolverStats and the solve time of every puzzle.
+# GET /stats reports request counts and the p50/p99 latency measured by the
+# server, from a request arriving to its answer being sent.
+LATENCY_WINDOW = 10000
+
+
+def _warm_worker():
+    # Bigger DLX matrices are built on first use; do it before any request waits.
+    for box in (4, 5):
+        if box not in DLX_TEMPLATES:
+            DLX_TEMPLATES[box] = build_dlx(box)
+
+
+def solve_many(engine, lines):
+    solver = SOLVERS[engine]
+    results = []
+    for line in lines:
+        board = parse_puzzle(line)
+        stats = SolverStats()
+        start = time.perf_counter()
+        solved = solver(board, stats=stats)
+        elapsed = (time.perf_counter() - start) * 1000
+        results.append((format_board(board) if solved else '-', stats.as_dict(), elapsed))
+    return results
+
+
+class Batcher:
+    """Collect concurrent solve requests and send them to the pool in batches.
+
+    A batch closes `window` seconds after its first request arrives or at
+    `max_batch` puzzles, whichever comes first. Each engine's share of a batch
+    is cut into at most `workers` tasks, so batching saves round trips to the
+    pool without leaving workers idle.
+    """
+
+    def __init__(self, pool, workers, window=0.002, max_batch=64):
+        self.pool = pool
+        self.workers = workers
+        self.window = window
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+        self.batches = self.tasks = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, engine, line):
+        future = Future()
+        self.requests.put((engine, line, future))
+        return future
+
+    def stop(self):
+        self.requests.put(None)
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            first = self.requests.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.requests.put(None)
+                    break
+                batch.append(item)
+            by_engine = {}
+            for engine, line, future in batch:
+                by_engine.setdefault(engine, []).append((line, future))
+            self.batches += 1
+            for engine, items in by_engine.items():
+                # Ceiling division: the fewest tasks of equal size that fit on the workers.
+                chunk = -(-len(items) // self.workers)
+                for k in range(0, len(items), chunk):
+                    self._dispatch(engine, items[k:k + chunk])
+
+    def _dispatch(self, engine, items):
+        futures = [future for _, future in items]
+
+        def done(results):
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+        def failed(error):
+            for future in futures:
+                future.set_exception(error)
+
+        self.tasks += 1
+        self.pool.apply_async(solve_many, (engine, [line for line, _ in items]),
+                              callback=done, error_callback=failed)
+
+
+class LatencyLog:
+    """Latencies of the last LATENCY_WINDOW requests, for percentiles."""
+
+    def __init__(self):
+        self.samples = deque(maxlen=LATENCY_WINDOW)
+        self.lock = threading.Lock()
+        self.requests = self.puzzles = self.errors = 0
+
+    def add(self, seconds, puzzles):
+        with self.lock:
+            self.samples.append(seconds * 1000)
+            self.requests += 1
+            self.puzzles += puzzles
+
+    def error(self):
+        with self.lock:
+            self.errors += 1
+
+    def percentile(self, q):
+        with self.lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self):
+        return {
+            'requests': self.requests,
+            'puzzles': self.puzzles,
+            'errors': self.errors,
+            'p50_ms': self.percentile(0.50),
+            'p99_ms': self.percentile(0.99),
+        }
+
+
+class SolveHandler(BaseHTTPRequestHandler):
+    server_version = 'SudokuServer/1.0'
+
+    def address_string(self):
+        # Unix socket clients have no address.
+        return self.client_address[0] if self.client_address else 'local'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            body = self.server.latency.summary()
+            body['batches'] = self.server.batcher.batches
+            body['tasks'] = self.server.batcher.tasks
+            body['workers'] = self.server.workers
+            self._reply(200, body)
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        if self.path != '/solve':
+            self._reply(404, {'error': 'not found'})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            engine = request.get('engine', 'propagation')
+            if engine not in SOLVERS:
+                raise ValueError(f"Unknown engine {engine!r}")
+            single = 'puzzle' in request
+            lines = [request['puzzle']] if single else list(request['puzzles'])
+            for line in lines:
+                parse_puzzle(line)
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            self.server.latency.error()
+            self._reply(400, {'error': str(error)})
+            return
+        futures = [self.server.batcher.submit(engine, line) for line in lines]
+        answers = []
+        for line, future in zip(lines, futures):
+            try:
+                solution, stats, elapsed = future.result()
+            except Exception as error:
+                self.server.latency.error()
+                self._reply(500, {'error': str(error)})
+                return
+            answers.append({'puzzle': line, 'solution': solution, 'solved': solution != '-',
+                            'ms': elapsed, 'stats': stats})
+        self._reply(200, {'engine': engine, **answers[0]} if single else {'engine': engine, 'results': answers})
+        self.server.latency.add(time.perf_counter() - start, len(lines))
+
+
+class SolveServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 drops connections under concurrent load.
+    request_queue_size = 128
+
+    def setup_service(self, workers, window, max_batch, verbose):
+        self.workers = workers
+        self.pool = Pool(workers, initializer=_warm_worker)
+        self.batcher = Batcher(self.pool, workers, window, max_batch)
+        self.latency = LatencyLog()
+        self.verbose = verbose
+
+    def shutdown_service(self):
+        self.batcher.stop()
+        self.pool.terminate()
+
+
+class UnixSolveServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+    setup_service = SolveServer.setup_service
+    shutdown_service = SolveServer.shutdown_service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Sudoku solvers over local HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="listen on this Unix socket path instead of TCP")
+    parser.add_argument('--workers', type=int, default=None, help="solver processes (default: CPU count)")
+    parser.add_argument('--window-ms', type=float, default=2.0, help="how long a batch waits for more requests")
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args(argv)
+
+    if args.unix:
+        if os.path.exists(args.unix):
+            os.unlink(args.unix)
+        server = UnixSolveServer(args.unix, SolveHandler)
+        where = args.unix
+    else:
+        server = SolveServer((args.host, args.port), SolveHandler)
+        where = f"http://{args.host}:{server.server_address[1]}"
+    workers = args.workers or os.cpu_count() or 1
+    server.setup_service(workers, args.window_ms / 1000, args.max_batch, args.verbose)
+    print(f"Serving on {where} with {workers} workers", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown_service()
+        server.server_close()
+        if args.unix:
+            os.unlink(args.unix)
+        print(json.dumps(server.latency.summary()), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1040 @@
+import time
+from itertools import islice
+from math import isqrt
+
+# Pure Sudoku solving core. Nothing in here touches Tkinter, so the same
+# solvers can run in batch jobs at full speed or drive the UI through an
+# observer callback.
+#
+# Observers are called as on_step(row, col, num) every time the search writes
+# a digit into a cell, and with num == 0 when that assignment is undone.
+#
+# Every solver also takes stats=SolverStats() to count what its search did.
+
+
+# Bitmask engine: digit d is bit (d - 1). Every row, column and box keeps a
+# mask of the digits already used, so a cell's candidates are one OR and one
+# AND away, and the trail lets backtracking undo assignments without copying
+# or rescanning the board. Propagation can also strike candidates from a
+# single cell; those eliminations share the same trail.
+#
+# Boards are size x size with size = box * box (9x9, 16x16, 25x25, ...). A
+# Geometry holds the index tables for one box size; STANDARD below is the
+# one for the standard 9x9 board.
+def _popcount(mask):
+    return bin(mask).count('1')
+
+
+def _mask_digits(mask):
+    digits = []
+    while mask:
+        bit = mask & -mask
+        digits.append(bit.bit_length())
+        mask ^= bit
+    return digits
+
+
+class Geometry:
+    __slots__ = ('box', 'size', 'cells', 'full', 'row_of', 'col_of', 'box_of', 'units', 'peers',
+                 'popcount', 'digits')
+
+    def __init__(self, box):
+        size = box * box
+        self.box = box
+        self.size = size
+        self.cells = size * size
+        self.full = (1 << size) - 1
+        self.row_of = [idx // size for idx in range(self.cells)]
+        self.col_of = [idx % size for idx in range(self.cells)]
+        self.box_of = [(idx // (size * box)) * box + (idx % size) // box for idx in range(self.cells)]
+        # Rows are units 0..size-1, then the columns, then the boxes.
+        self.units = ([[r * size + c for c in range(size)] for r in range(size)]
+                      + [[r * size + c for r in range(size)] for c in range(size)]
+                      + [[idx for idx in range(self.cells) if self.box_of[idx] == b] for b in range(size)])
+        self.peers = [sorted(set(self.units[self.row_of[idx]] + self.units[size + self.col_of[idx]]
+                                 + self.units[2 * size + self.box_of[idx]]) - {idx})
+                      for idx in range(self.cells)]
+        # Lookup tables stop paying off past 9 digits (2**16 or 2**25 entries).
+        if size == 9:
+            self.popcount = POPCOUNT.__getitem__
+            self.digits = MASK_DIGITS.__getitem__
+        else:
+            self.popcount = _popcount
+            self.digits = _mask_digits
+
+
+POPCOUNT = [_popcount(mask) for mask in range(1 << 9)]
+MASK_DIGITS = [tuple(_mask_digits(mask)) for mask in range(1 << 9)]
+GEOMETRIES = {}
+
+
+def geometry(box=3):
+    if box not in GEOMETRIES:
+        GEOMETRIES[box] = Geometry(box)
+    return GEOMETRIES[box]
+
+
+def box_size(board):
+    """Return the box size of a square board (3 for 9x9, 4 for 16x16, ...)."""
+    size = len(board)
+    box = isqrt(size)
+    if size < 1 or box * box != size or any(len(row) != size for row in board):
+        raise ValueError(f"Not a Sudoku board: {size} rows")
+    return box
+
+
+STANDARD = geometry(3)
+FULL = STANDARD.full
+
+
+class BitBoard:
+    __slots__ = ('geo', 'full', 'row_of', 'col_of', 'box_of', 'cells', 'rows', 'cols', 'boxes', 'elim', 'trail',
+                 'struck')
+
+    def __init__(self, board):
+        geo = self.geo = geometry(box_size(board))
+        self.full, self.row_of, self.col_of, self.box_of = geo.full, geo.row_of, geo.col_of, geo.box_of
+        size = geo.size
+        self.cells = [0] * geo.cells
+        self.rows = [0] * size
+        self.cols = [0] * size
+        self.boxes = [0] * size
+        self.elim = [0] * geo.cells
+        self.trail = []
+        self.struck = 0  # candidates removed by eliminate() so far, never taken back
+        for idx in range(geo.cells):
+            num = board[idx // size][idx % size]
+            if num:
+                if not 0 < num <= size or not self.candidates(idx) >> (num - 1) & 1:
+                    raise ValueError(f"Digit {num} conflicts at row {idx // size}, column {idx % size}")
+                self.place(idx, num)
+        # Givens are not part of the search, so they can never be undone.
+        self.trail.clear()
+
+    def candidates(self, idx):
+        return self.full & ~(self.rows[self.row_of[idx]] | self.cols[self.col_of[idx]]
+                             | self.boxes[self.box_of[idx]] | self.elim[idx])
+
+    def count(self, idx):
+        return self.geo.popcount(self.candidates(idx))
+
+    def place(self, idx, num):
+        bit = 1 << (num - 1)
+        self.cells[idx] = num
+        self.rows[self.row_of[idx]] |= bit
+        self.cols[self.col_of[idx]] |= bit
+        self.boxes[self.box_of[idx]] |= bit
+        self.trail.append(idx)
+
+    def eliminate(self, idx, mask):
+        self.struck += self.geo.popcount(self.candidates(idx) & mask)
+        self.trail.append((idx, self.elim[idx]))
+        self.elim[idx] |= mask
+
+    def undo(self):
+        idx = self.trail.pop()
+        keep = ~(1 << (self.cells[idx] - 1))
+        self.cells[idx] = 0
+        self.rows[self.row_of[idx]] &= keep
+        self.cols[self.col_of[idx]] &= keep
+        self.boxes[self.box_of[idx]] &= keep
+        return idx
+
+    def undo_to(self, mark, on_step=None):
+        trail = self.trail
+        size = self.geo.size
+        while len(trail) > mark:
+            entry = trail[-1]
+            if type(entry) is tuple:
+                trail.pop()
+                self.elim[entry[0]] = entry[1]
+            else:
+                idx = self.undo()
+                if on_step:
+                    on_step(idx // size, idx % size, 0)
+
+    def empty_cells(self):
+        return [idx for idx, num in enumerate(self.cells) if not num]
+
+    def write_to(self, board):
+        size = self.geo.size
+        for idx, num in enumerate(self.cells):
+            board[idx // size][idx % size] = num
+
+
+class SolverStats:
+    """What one solve did, filled in by a solver called with stats=SolverStats().
+
+    nodes         digits tried by the search (givens and forced digits excluded)
+    backtracks    tried digits that were taken back again
+    eliminations  candidates struck out by propagation, plus one for every
+                  digit it placed
+    max_depth     most guesses on the board at once
+    branching     branching[depth][k]: cells opened at that depth with k choices
+    phases        seconds spent in 'setup', 'search' and, inside the search,
+                  'propagate'
+
+    on_node(depth, row, col, num) is called for every node when given.
+    """
+
+    __slots__ = ('nodes', 'backtracks', 'eliminations', 'max_depth', 'branching', 'phases', 'on_node')
+
+    def __init__(self, on_node=None):
+        self.nodes = self.backtracks = self.eliminations = self.max_depth = 0
+        self.branching = []
+        self.phases = {}
+        self.on_node = on_node
+
+    def branch(self, depth, width):
+        while len(self.branching) <= depth:
+            self.branching.append({})
+        level = self.branching[depth]
+        level[width] = level.get(width, 0) + 1
+
+    def node(self, depth, idx, size, num):
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.on_node:
+            self.on_node(depth, idx // size, idx % size, num)
+
+    def lap(self, phase, since):
+        """Add the time from `since` to now to `phase`; returns now."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - since
+        return now
+
+    def as_dict(self):
+        return {
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'eliminations': self.eliminations,
+            'max_depth': self.max_depth,
+            'branching': [{str(k): n for k, n in sorted(level.items())} for level in self.branching],
+            'phases': dict(self.phases),
+        }
+
+    def __str__(self):
+        phases = ', '.join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in self.phases.items())
+        return (f"{self.nodes} nodes, {self.backtracks} backtracks, {self.eliminations} eliminations, "
+                f"depth {self.max_depth}; {phases}")
+
+
+def dfs_solve(board, on_step=None, stats=None):
+    start = time.perf_counter()
+    try:
+        state = BitBoard(board)
+    except ValueError:
+        return False
+    empty_cells = state.empty_cells()
+    size, cells = state.geo.size, state.cells
+    popcount = state.geo.popcount
+    # untried[k] holds the digits not yet tried in the k-th empty cell.
+    untried = [0] * len(empty_cells)
+    k = 0
+    if empty_cells:
+        untried[0] = state.candidates(empty_cells[0])
+        if stats:
+            stats.branch(0, popcount(untried[0]))
+    if stats:
+        start = stats.lap('setup', start)
+    while k < len(empty_cells):
+        idx = empty_cells[k]
+        if cells[idx]:
+            state.undo()
+            if stats:
+                stats.backtracks += 1
+            if on_step:
+                on_step(idx // size, idx % size, 0)
+        mask = untried[k]
+        if not mask:
+            k -= 1
+            if k < 0:
+                if stats:
+                    stats.lap('search', start)
+                return False
+            continue
+        bit = mask & -mask
+        untried[k] = mask ^ bit
+        num = bit.bit_length()
+        state.place(idx, num)
+        k += 1
+        if stats:
+            stats.node(k, idx, size, num)
+        if on_step:
+            on_step(idx // size, idx % size, num)
+        if k < len(empty_cells):
+            untried[k] = state.candidates(empty_cells[k])
+            if stats:
+                stats.branch(k, popcount(untried[k]))
+    if stats:
+        stats.lap('search', start)
+    state.write_to(board)
+    return True
+
+
+class CandidateBuckets:
+    """Empty cells of a BitBoard bucketed by their current candidate count.
+
+    Placing or undoing a digit only touches the peers of that cell, so the
+    counts never go stale and the most constrained cell is found by scanning
+    size + 1 buckets.
+    """
+
+    __slots__ = ('state', 'peers', 'count', 'buckets')
+
+    def __init__(self, state):
+        self.state = state
+        self.peers = state.geo.peers
+        self.count = [0] * state.geo.cells
+        self.buckets = [set() for _ in range(state.geo.size + 1)]
+        for idx in state.empty_cells():
+            self.add(idx)
+
+    def add(self, idx):
+        n = self.state.count(idx)
+        self.count[idx] = n
+        self.buckets[n].add(idx)
+
+    def remove(self, idx):
+        self.buckets[self.count[idx]].discard(idx)
+
+    def _shift(self, idx, bit, delta):
+        state = self.state
+        cells, count, buckets = state.cells, self.count, self.buckets
+        for peer in self.peers[idx]:
+            if not cells[peer] and state.candidates(peer) & bit:
+                n = count[peer]
+                buckets[n].discard(peer)
+                count[peer] = n + delta
+                buckets[n + delta].add(peer)
+
+    def place(self, idx, num):
+        bit = 1 << (num - 1)
+        self._shift(idx, bit, -1)
+        self.state.place(idx, num)
+
+    def undo(self):
+        state = self.state
+        idx = state.trail[-1]
+        bit = 1 << (state.cells[idx] - 1)
+        state.undo()
+        self._shift(idx, bit, 1)
+        return idx
+
+    def pick(self):
+        for bucket in self.buckets:
+            if bucket:
+                return next(iter(bucket))
+        return -1
+
+
+def heuristic_solve(board, on_step=None, stats=None):
+    start = time.perf_counter()
+    try:
+        state = BitBoard(board)
+    except ValueError:
+        return False
+    cells = CandidateBuckets(state)
+    size, popcount = state.geo.size, state.geo.popcount
+    if stats:
+        start = stats.lap('setup', start)
+    # Explicit stack of [cell, digits not yet tried there].
+    stack = []
+    idx = cells.pick()
+    while idx >= 0:
+        cells.remove(idx)
+        stack.append([idx, state.candidates(idx)])
+        if stats:
+            stats.branch(len(stack) - 1, popcount(stack[-1][1]))
+        while True:
+            frame = stack[-1]
+            idx, untried = frame
+            if state.cells[idx]:
+                cells.undo()
+                if stats:
+                    stats.backtracks += 1
+                if on_step:
+                    on_step(idx // size, idx % size, 0)
+            if untried:
+                break
+            cells.add(idx)
+            stack.pop()
+            if not stack:
+                if stats:
+                    stats.lap('search', start)
+                return False
+        bit = untried & -untried
+        frame[1] = untried ^ bit
+        cells.place(idx, bit.bit_length())
+        if stats:
+            stats.node(len(stack), idx, size, bit.bit_length())
+        if on_step:
+            on_step(idx // size, idx % size, bit.bit_length())
+        idx = cells.pick()
+    if stats:
+        stats.lap('search', start)
+    state.write_to(board)
+    return True
+
+
+# Constraint propagation. Each pass works on a snapshot of the candidate
+# masks (0 for filled cells) and returns as soon as it changes the board, so
+# propagate() can restart from the cheapest technique.
+def _place_singles(state, on_step):
+    # Placing a digit can only create new singles among its peers, so those
+    # are the only cells that get checked again.
+    cells, peers, size = state.cells, state.geo.peers, state.geo.size
+    changed = False
+    todo = list(range(len(cells) - 1, -1, -1))
+    while todo:
+        idx = todo.pop()
+        if not cells[idx]:
+            mask = state.candidates(idx)
+            if not mask:
+                return None
+            if not mask & (mask - 1):
+                num = mask.bit_length()
+                state.place(idx, num)
+                if on_step:
+                    on_step(idx // size, idx % size, num)
+                todo.extend(peers[idx])
+                changed = True
+    return changed
+
+
+def _place_hidden_singles(state, cand, on_step):
+    cells, geo = state.cells, state.geo
+    full, size = geo.full, geo.size
+    changed = False
+    for unit in geo.units:
+        once = twice = placed = 0
+        for idx in unit:
+            if cells[idx]:
+                placed |= 1 << (cells[idx] - 1)
+            else:
+                mask = cand[idx]
+                twice |= once & mask
+                once |= mask
+        if (once | placed) != full:
+            return None
+        # The snapshot may predate placements made earlier in this pass.
+        singles = once & ~twice & ~placed
+        while singles:
+            bit = singles & -singles
+            singles ^= bit
+            num = bit.bit_length()
+            for idx in unit:
+                if not cells[idx] and cand[idx] & bit:
+                    break
+            else:
+                # Its only cell already took another hidden single.
+                return None
+            if not state.candidates(idx) & bit:
+                return None
+            state.place(idx, num)
+            if on_step:
+                on_step(idx // size, idx % size, num)
+            changed = True
+    return changed
+
+
+def _confined(segments):
+    # Digits that appear in exactly one of the segments.
+    once = twice = 0
+    for mask in segments:
+        twice |= once & mask
+        once |= mask
+    return once & ~twice
+
+
+def _eliminate_pointing(state, cand):
+    geo = state.geo
+    box, size, units, row_of, col_of, box_of = geo.box, geo.size, geo.units, geo.row_of, geo.col_of, geo.box_of
+    changed = False
+    for b in range(size):
+        top = (b // box) * size * box + (b % box) * box
+        rows, cols = [0] * box, [0] * box
+        for i in range(box):
+            for j in range(box):
+                mask = cand[top + i * size + j]
+                rows[i] |= mask
+                cols[j] |= mask
+        alone_rows, alone_cols = _confined(rows), _confined(cols)
+        for i in range(box):
+            # Box/line: a digit confined to one row of the box leaves the rest of that row.
+            only = rows[i] & alone_rows
+            if only:
+                for idx in units[top // size + i]:
+                    if box_of[idx] != b and cand[idx] & only:
+                        state.eliminate(idx, only)
+                        changed = True
+            only = cols[i] & alone_cols
+            if only:
+                for idx in units[size + top % size + i]:
+                    if box_of[idx] != b and cand[idx] & only:
+                        state.eliminate(idx, only)
+                        changed = True
+    for u in range(2 * size):
+        unit = units[u]
+        segs = [0] * box
+        for k in range(size):
+            segs[k // box] |= cand[unit[k]]
+        alone = _confined(segs)
+        for k in range(box):
+            # Line/box: a digit confined to one box segment of the line leaves the rest of that box.
+            only = segs[k] & alone
+            if only:
+                b = box_of[unit[box * k]]
+                for idx in units[2 * size + b]:
+                    if (row_of[idx] if u < size else col_of[idx]) != u % size and cand[idx] & only:
+                        state.eliminate(idx, only)
+                        changed = True
+    return changed
+
+
+def _eliminate_pairs(state, cand):
+    popcount, digits = state.geo.popcount, state.geo.digits
+    changed = False
+    for unit in state.geo.units:
+        # Naked pairs: two cells holding the same two candidates own those digits.
+        seen = {}
+        for idx in unit:
+            mask = cand[idx]
+            if popcount(mask) == 2:
+                if mask in seen:
+                    for other in unit:
+                        if other != idx and other != seen[mask] and cand[other] & mask:
+                            state.eliminate(other, mask)
+                            changed = True
+                else:
+                    seen[mask] = idx
+        # Hidden pairs: two digits confined to the same two cells exclude everything else there.
+        once = twice = more = 0
+        for idx in unit:
+            mask = cand[idx]
+            more |= twice & mask
+            twice |= once & mask
+            once |= mask
+        doubles = twice & ~more
+        if popcount(doubles) >= 2:
+            places = {}
+            for num in digits(doubles):
+                bit = 1 << (num - 1)
+                where = tuple(idx for idx in unit if cand[idx] & bit)
+                if where in places:
+                    pair = places[where] | bit
+                    for idx in where:
+                        if cand[idx] & ~pair:
+                            state.eliminate(idx, cand[idx] & ~pair)
+                            changed = True
+                else:
+                    places[where] = bit
+        if changed:
+            return True
+    return False
+
+
+# Technique levels for propagate(); each level includes the ones below it.
+SINGLES, INTERSECTIONS, PAIRS = 1, 2, 3
+
+
+def propagate(state, on_step=None, level=PAIRS):
+    """Apply singles, pointing/box-line and pair rules until nothing changes.
+
+    `level` caps the techniques used (SINGLES, INTERSECTIONS or PAIRS).
+    Returns False as soon as a contradiction shows up. Every change goes on
+    the state's trail, so callers can roll a failed guess back with undo_to().
+    """
+    while True:
+        if _place_singles(state, on_step) is None:
+            return False
+        cand = [0 if num else state.candidates(idx) for idx, num in enumerate(state.cells)]
+        found = _place_hidden_singles(state, cand, on_step)
+        if found is None:
+            return False
+        if found:
+            continue
+        if level >= INTERSECTIONS and _eliminate_pointing(state, cand):
+            continue
+        if level >= PAIRS and _eliminate_pairs(state, cand):
+            continue
+        return True
+
+
+def most_constrained(state):
+    """Return the empty cell of `state` with the fewest candidates, or -1 when the board is full."""
+    best, best_count = -1, state.geo.size + 1
+    for idx, num in enumerate(state.cells):
+        if not num:
+            n = state.count(idx)
+            if n < best_count:
+                best, best_count = idx, n
+                if n == 2:
+                    break
+    return best
+
+
+class Search:
+    """Propagation search on an explicit stack, advanced a bounded number of nodes at a time.
+
+    Propagate, then branch on the most constrained cell; every frame on the
+    stack is [cell, digits not yet tried there, trail length before the
+    current try]. run() stops on each solution or after `max_nodes` nodes, so
+    a caller can time-slice the search, snapshot() it, drop it to cancel, and
+    pick it up again later, even in another process with Search.restore().
+    """
+
+    def __init__(self, board, on_step=None, stats=None):
+        self.state = board if isinstance(board, BitBoard) else BitBoard(board)
+        self.initial = self.state.cells[:]
+        self.on_step = on_step
+        self.stats = stats
+        self.stack = []
+        self.nodes = 0
+        self.started = False
+        self.solved = False  # True while the state holds a solution
+        self.done = False
+
+    def _expand(self):
+        # Propagate and push the next branching cell. True when the board is full.
+        state, stats = self.state, self.stats
+        if stats:
+            start, mark, struck = time.perf_counter(), len(state.trail), state.struck
+            consistent = propagate(state, self.on_step)
+            stats.lap('propagate', start)
+            placed = sum(1 for entry in state.trail[mark:] if type(entry) is not tuple)
+            stats.eliminations += state.struck - struck + placed
+            if not consistent:
+                return False
+        elif not propagate(state, self.on_step):
+            return False
+        best = most_constrained(state)
+        if best < 0:
+            return True
+        if stats:
+            stats.branch(len(self.stack), state.count(best))
+        self.stack.append([best, state.candidates(best), len(state.trail)])
+        return False
+
+    def run(self, max_nodes=None):
+        """Search on to the next solution (True), or until exhausted or out of nodes (False).
+
+        After False, `done` tells the two apart.
+        """
+        stats = self.stats
+        if stats:
+            start = time.perf_counter()
+            found = self._run(max_nodes)
+            stats.lap('search', start)
+            return found
+        return self._run(max_nodes)
+
+    def _run(self, max_nodes):
+        state, stack, on_step, stats = self.state, self.stack, self.on_step, self.stats
+        size = state.geo.size
+        self.solved = False
+        if not self.started:
+            self.started = True
+            if self._expand():
+                self.solved = True
+                return True
+        budget = max_nodes
+        while stack:
+            if budget is not None:
+                if budget <= 0:
+                    return False
+                budget -= 1
+            frame = stack[-1]
+            idx, untried, mark = frame
+            if stats and len(state.trail) > mark:
+                stats.backtracks += 1
+            state.undo_to(mark, on_step)
+            if not untried:
+                # Take the parent's digit back at once, so no frame ever
+                # holds a digit whose subtree is exhausted (see snapshot()).
+                stack.pop()
+                if stack:
+                    mark = stack[-1][2]
+                    if stats and len(state.trail) > mark:
+                        stats.backtracks += 1
+                    state.undo_to(mark, on_step)
+                continue
+            bit = untried & -untried
+            frame[1] = untried ^ bit
+            state.place(idx, bit.bit_length())
+            self.nodes += 1
+            if stats:
+                stats.node(len(stack), idx, size, bit.bit_length())
+            if on_step:
+                on_step(idx // size, idx % size, bit.bit_length())
+            if self._expand():
+                self.solved = True
+                return True
+        self.done = True
+        return False
+
+    def steps(self, max_nodes=256):
+        """Generator form of run(): yields the search after every slice of nodes and every solution."""
+        while not self.done:
+            self.run(max_nodes)
+            yield self
+
+    def cancel(self):
+        self.stack.clear()
+        self.done = True
+
+    def solution(self):
+        size = self.state.geo.size
+        cells = self.state.cells
+        return [cells[r * size:(r + 1) * size] for r in range(size)]
+
+    def snapshot(self):
+        """Plain data (lists and ints) from which restore() rebuilds this search."""
+        cells = self.state.cells
+        return {
+            'initial': self.initial[:],
+            'frames': [(idx, untried, cells[idx]) for idx, untried, _ in self.stack],
+            'nodes': self.nodes,
+            'started': self.started,
+            'done': self.done,
+        }
+
+    @classmethod
+    def restore(cls, snapshot, on_step=None):
+        # Propagation is deterministic, so replaying the digit chosen in every
+        # frame rebuilds the exact state, trail marks included.
+        cells = snapshot['initial']
+        size = isqrt(len(cells))
+        search = cls([cells[r * size:(r + 1) * size] for r in range(size)])
+        search.nodes = snapshot['nodes']
+        search.started = snapshot['started']
+        search.done = snapshot['done']
+        if search.started and not search.done:
+            search._expand()
+            for idx, untried, num in snapshot['frames']:
+                frame = search.stack[-1]
+                if frame[0] != idx:
+                    raise ValueError("Snapshot does not match its puzzle")
+                frame[1] = untried
+                if num:
+                    search.state.place(idx, num)
+                    search._expand()
+            search.solved = 0 not in search.state.cells
+        search.on_step = on_step
+        return search
+
+
+def _search(state, on_step=None, stats=None):
+    # Yields the state itself every time it is completely filled; read it before resuming.
+    search = Search(state, on_step, stats)
+    while search.run():
+        yield state
+
+
+def propagation_solve(board, on_step=None, stats=None):
+    start = time.perf_counter()
+    try:
+        state = BitBoard(board)
+    except ValueError:
+        return False
+    if stats:
+        stats.lap('setup', start)
+    for solved in _search(state, on_step, stats):
+        solved.write_to(board)
+        return True
+    return False
+
+
+def count_solutions(board, limit=2):
+    """Count the solutions of `board`, stopping once `limit` have been found."""
+    try:
+        state = BitBoard(board)
+    except ValueError:
+        return 0
+    return sum(1 for _ in islice(_search(state), limit))
+
+
+def iter_solutions(board):
+    """Yield every solution of `board` as a new grid of lists, one at a time."""
+    try:
+        state = BitBoard(board)
+    except ValueError:
+        return
+    size = state.geo.size
+    for solved in _search(state):
+        cells = solved.cells
+        yield [cells[r * size:(r + 1) * size] for r in range(size)]
+
+
+class BoardTracker:
+    """Per-row/column/box digit counts for a grid that is edited one cell at a time.
+
+    Every edit costs O(1): only the three units of the cell are touched.
+    Conflicts and completion are read straight from the counts. `solvable()`
+    searches on top of a BitBoard that already mirrors the grid and then
+    rolls back, so nothing has to be rebuilt between edits.
+    """
+
+    def __init__(self, board):
+        size = len(board)
+        self.state = BitBoard([[0] * size for _ in range(size)])
+        self.geo = self.state.geo
+        self.counts = [[0] * (size + 1) for _ in range(3 * size)]
+        self.duplicates = 0  # (unit, digit) pairs seen more than once
+        self.filled = 0
+        self._solvable = None
+        for idx in range(self.geo.cells):
+            self.set(idx, board[idx // size][idx % size])
+
+    def _units(self, idx):
+        geo = self.geo
+        return geo.row_of[idx], geo.size + geo.col_of[idx], 2 * geo.size + geo.box_of[idx]
+
+    def _count(self, idx, num, delta):
+        bit = 1 << (num - 1)
+        masks = (self.state.rows, self.state.cols, self.state.boxes)
+        for kind, unit in enumerate(self._units(idx)):
+            counts = self.counts[unit]
+            counts[num] += delta
+            if counts[num] == (2 if delta > 0 else 1):
+                self.duplicates += delta
+            mask = masks[kind]
+            unit -= kind * self.geo.size
+            if counts[num]:
+                mask[unit] |= bit
+            else:
+                mask[unit] &= ~bit
+
+    def set(self, idx, num):
+        """Put `num` (0 to clear) at `idx`. Returns the cells whose conflict state may have changed."""
+        cells = self.state.cells
+        old = cells[idx]
+        if old == num:
+            return ()
+        self._solvable = None
+        if old:
+            self._count(idx, old, -1)
+            self.filled -= 1
+        cells[idx] = num
+        if num:
+            self._count(idx, num, 1)
+            self.filled += 1
+        touched = {idx}
+        for unit in self._units(idx):
+            touched.update(other for other in self.geo.units[unit] if cells[other] and cells[other] in (old, num))
+        return touched
+
+    def conflicts(self, idx):
+        num = self.state.cells[idx]
+        return bool(num) and any(self.counts[unit][num] > 1 for unit in self._units(idx))
+
+    def is_complete(self):
+        return self.filled == self.geo.cells and not self.duplicates
+
+    def solvable(self):
+        """Whether the grid, as it stands, still leads to a solution."""
+        if self._solvable is None:
+            if self.duplicates:
+                self._solvable = False
+            else:
+                mark = len(self.state.trail)
+                self._solvable = next(_search(self.state), None) is not None
+                self.state.undo_to(mark)
+        return self._solvable
+
+
+# Dancing Links: Sudoku as exact cover over 4 * size**2 constraints (cell
+# filled, row/col/box holds digit) and size**3 candidate rows (cell, digit);
+# 324 and 729 for 9x9. Nodes live in parallel int lists instead of per-node
+# objects; node 0 is the root and the next 4 * size**2 nodes are the column
+# headers. A template is built once per box size and copied for every solve.
+def build_dlx(box=3):
+    geo = geometry(box)
+    width, cells = geo.size, geo.cells
+    n = 4 * cells + 1
+    left = [i - 1 for i in range(n)]
+    right = [i + 1 for i in range(n)]
+    left[0], right[n - 1] = n - 1, 0
+    up = list(range(n))
+    down = list(range(n))
+    column = list(range(n))
+    size = [0] * n
+    row_of = [-1] * n
+    row_start = []
+
+    for idx in range(cells):
+        for d in range(width):
+            cols = (1 + idx,
+                    1 + cells + geo.row_of[idx] * width + d,
+                    1 + 2 * cells + geo.col_of[idx] * width + d,
+                    1 + 3 * cells + geo.box_of[idx] * width + d)
+            first = len(left)
+            row_start.append(first)
+            for k, col in enumerate(cols):
+                node = first + k
+                left.append(first + (k - 1) % 4)
+                right.append(first + (k + 1) % 4)
+                column.append(col)
+                row_of.append(idx * width + d)
+                up.append(up[col])
+                down.append(col)
+                down[up[col]] = node
+                up[col] = node
+                size[col] += 1
+    return left, right, up, down, column, size, row_of, row_start
+
+
+DLX_TEMPLATES = {3: build_dlx(3)}
+
+
+def dlx_solve(board, on_step=None, stats=None):
+    start = time.perf_counter()
+    try:
+        geo = BitBoard(board).geo
+    except ValueError:
+        return False
+    if geo.box not in DLX_TEMPLATES:
+        DLX_TEMPLATES[geo.box] = build_dlx(geo.box)
+    left, right, up, down, column, size, row_of, row_start = (
+        list(part) for part in DLX_TEMPLATES[geo.box])
+    n = geo.size
+    cells = [board[idx // n][idx % n] for idx in range(geo.cells)]
+
+    def cover(c):
+        left[right[c]] = left[c]
+        right[left[c]] = right[c]
+        i = down[c]
+        while i != c:
+            j = right[i]
+            while j != i:
+                up[down[j]] = up[j]
+                down[up[j]] = down[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(c):
+        i = up[c]
+        while i != c:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                up[down[j]] = j
+                down[up[j]] = j
+                j = left[j]
+            i = up[i]
+        left[right[c]] = c
+        right[left[c]] = c
+
+    for idx in range(geo.cells):
+        if cells[idx]:
+            node = row_start[idx * n + cells[idx] - 1]
+            for k in range(4):
+                cover(column[node + k])
+
+    def search(depth):
+        if right[0] == 0:
+            return True
+
+        # Branch on the constraint with the fewest remaining candidates.
+        c, best = 0, n + 1
+        j = right[0]
+        while j:
+            if size[j] < best:
+                c, best = j, size[j]
+                if best < 2:
+                    break
+            j = right[j]
+        if stats:
+            stats.branch(depth, best)
+        if best == 0:
+            return False
+
+        cover(c)
+        r = down[c]
+        while r != c:
+            idx, num = divmod(row_of[r], n)
+            cells[idx] = num + 1
+            if stats:
+                stats.node(depth + 1, idx, n, num + 1)
+            if on_step:
+                on_step(idx // n, idx % n, num + 1)
+            j = right[r]
+            while j != r:
+                cover(column[j])
+                j = right[j]
+            if search(depth + 1):
+                return True
+            j = left[r]
+            while j != r:
+                uncover(column[j])
+                j = left[j]
+            cells[idx] = 0
+            if stats:
+                stats.backtracks += 1
+            if on_step:
+                on_step(idx // n, idx % n, 0)
+            r = down[r]
+        uncover(c)
+        return False
+
+    if stats:
+        start = stats.lap('setup', start)
+    found = search(0)
+    if stats:
+        stats.lap('search', start)
+    if not found:
+        return False
+    for idx in range(geo.cells):
+        board[idx // n][idx % n] = cells[idx]
+    return True
+
+
+SOLVERS = {
+    'dfs': dfs_solve,
+    'heuristic': heuristic_solve,
+    'dlx': dlx_solve,
+    'propagation': propagation_solve,
+}
+
+
+# Digits above 9 are written as letters, A = 10 up to P = 25.
+DIGIT_CHARS = '.123456789ABCDEFGHIJKLMNOP'
+
+
+def parse_puzzle(line):
+    """Read the one-line format: size * size characters, digits 1-9 then A-P, '0' or '.' for blanks.
+
+    16 characters make a 4x4 board, 81 a 9x9 board, 256 a 16x16 board and 625 a 25x25 board.
+    """
+    line = line.strip()
+    size = isqrt(len(line))
+    if size * size != len(line) or isqrt(size) ** 2 != size or not 4 <= size < len(DIGIT_CHARS):
+        raise ValueError(f"Expected 16, 81, 256 or 625 characters, got {len(line)}")
+    cells = []
+    for ch in line.upper():
+        num = 0 if ch == '0' else DIGIT_CHARS.find(ch)
+        if not 0 <= num <= size:
+            raise ValueError(f"Invalid character {ch!r} in puzzle")
+        cells.append(num)
+    return [cells[r * size:(r + 1) * size] for r in range(size)]
+
+
+def format_board(board):
+    return ''.join(DIGIT_CHARS[num] for row in board for num in row)
+
+
+class SolveCancelled(Exception):
+    """Raised from an observer to abandon the search it is watching."""
+
+
+def cancellable(event, on_step=None):
+    """Wrap `on_step` so the search stops with SolveCancelled once `event` is set."""
+    def check(row, col, num):
+        if event.is_set():
+            raise SolveCancelled
+        if on_step:
+            on_step(row, col, num)
+    return check
+
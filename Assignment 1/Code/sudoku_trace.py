@@ -0,0 +1,135 @@
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+from sudoku_solver import box_size, cancellable
+
+# Solver traces: the place/undo events of one solve, recorded once and then
+# replayed at any speed, seeked or skipped to the end without solving again.
+# Each event is one uint16, cell index << shift | digit (0 for an undo),
+# where shift is 4 bits for 9x9 and 5 for 16x16 and 25x25. Saved traces are
+# zlib-compressed, so even long backtracking runs stay small.
+MAGIC = b'SDKT'
+VERSION = 2
+HEADER = struct.Struct('<4sBBBIId')
+CHECKPOINT_EVERY = 4096
+
+
+def digit_bits(size):
+    return size.bit_length()
+
+
+class TraceRecorder:
+    """Observer that appends every solver step to a compact event array."""
+
+    def __init__(self, size=9):
+        self.size = size
+        self.shift = digit_bits(size)
+        self.events = array('H')
+
+    def __call__(self, row, col, num):
+        self.events.append((row * self.size + col) << self.shift | num)
+
+
+class Trace:
+    def __init__(self, board, events, solved=False, elapsed=0.0):
+        self.box = box_size(board)
+        self.size = len(board)
+        self.shift = digit_bits(self.size)
+        self.initial = bytes(num for row in board for num in row)
+        self.events = events
+        self.solved = solved
+        self.elapsed = elapsed
+        self._checkpoints = None
+
+    def __len__(self):
+        return len(self.events)
+
+    def _cells_at(self, step):
+        # Full snapshots every CHECKPOINT_EVERY events bound the cost of a seek.
+        shift, digit = self.shift, (1 << self.shift) - 1
+        if self._checkpoints is None:
+            cells = bytearray(self.initial)
+            self._checkpoints = [bytes(cells)]
+            for k, code in enumerate(self.events, 1):
+                cells[code >> shift] = code & digit
+                if k % CHECKPOINT_EVERY == 0:
+                    self._checkpoints.append(bytes(cells))
+        step = max(0, min(step, len(self.events)))
+        base = step // CHECKPOINT_EVERY
+        cells = bytearray(self._checkpoints[base])
+        for code in self.events[base * CHECKPOINT_EVERY:step]:
+            cells[code >> shift] = code & digit
+        return cells
+
+    def board_at(self, step):
+        cells, size = self._cells_at(step), self.size
+        return [list(cells[r * size:(r + 1) * size]) for r in range(size)]
+
+    def final_board(self):
+        return self.board_at(len(self.events))
+
+    def changes(self, start, stop):
+        """Return {(row, col): num} for the cells that differ between two steps."""
+        shift, size = self.shift, self.size
+        if 0 <= start <= stop <= len(self.events) and stop - start <= CHECKPOINT_EVERY:
+            digit = (1 << shift) - 1
+            changed = {}
+            for code in self.events[start:stop]:
+                changed[divmod(code >> shift, size)] = code & digit
+            return changed
+        before, after = self._cells_at(start), self._cells_at(stop)
+        return {divmod(idx, size): after[idx] for idx in range(len(after)) if before[idx] != after[idx]}
+
+    def to_bytes(self):
+        events = array('H', self.events)
+        if sys.byteorder == 'big':
+            events.byteswap()
+        payload = zlib.compress(events.tobytes(), 9)
+        header = HEADER.pack(MAGIC, VERSION, self.box, self.solved, len(self.events), len(payload), self.elapsed)
+        return header + self.initial + payload
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, box, solved, count, length, elapsed = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a Sudoku trace")
+        size = box * box
+        start = HEADER.size
+        end = start + size * size
+        events = array('H')
+        events.frombytes(zlib.decompress(data[end:end + length]))
+        if sys.byteorder == 'big':
+            events.byteswap()
+        if len(events) != count:
+            raise ValueError("Truncated Sudoku trace")
+        board = [list(data[start + r * size:start + (r + 1) * size]) for r in range(size)]
+        return cls(board, events, bool(solved), elapsed)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+def record(algorithm, board, cancel=None, stats=None):
+    """Solve a copy of `board` once, recording every step. Returns a Trace.
+
+    With a threading.Event as `cancel`, setting it stops the solve with
+    SolveCancelled. A SolverStats passed as `stats` is handed to the solver.
+    """
+    recorder = TraceRecorder(len(board))
+    on_step = cancellable(cancel, recorder) if cancel is not None else recorder
+    start = time.perf_counter()
+    if stats is not None:
+        solved = algorithm([row[:] for row in board], on_step, stats=stats)
+    else:
+        solved = algorithm([row[:] for row in board], on_step)
+    elapsed = time.perf_counter() - start
+    return Trace(board, recorder.events, solved, elapsed)
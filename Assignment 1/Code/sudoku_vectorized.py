@@ -0,0 +1,111 @@
+import numpy as np
+
+from sudoku_solver import FULL, propagation_solve
+
+# Vectorized batch solving. A batch of N puzzles is an (N, 9, 9) array of
+# 9-bit candidate masks (bit d - 1 set when digit d is still possible), the
+# packed form of an (N, 9, 9, 9) candidate tensor. Naked and hidden singles
+# run on every puzzle at once with per-unit OR reductions, and only the
+# puzzles that still have open cells afterwards go to a scalar backtracker.
+#
+# NumPy is an optional dependency needed by this module only (and so by
+# sudoku_batch.py --engine vectorized); install it with pip install numpy.
+POPCOUNT = np.array([bin(mask).count('1') for mask in range(FULL + 1)], dtype=np.uint8)
+DIGIT = np.array([mask.bit_length() if POPCOUNT[mask] == 1 else 0 for mask in range(FULL + 1)],
+                 dtype=np.int8)
+BOX_INDEX = np.array([[(r // 3) * 3 + c // 3 for c in range(9)] for r in range(9)])
+
+
+def candidate_masks(puzzles):
+    puzzles = np.asarray(puzzles, dtype=np.int64).reshape(-1, 9, 9)
+    return np.where(puzzles > 0, 1 << np.maximum(puzzles - 1, 0), FULL).astype(np.uint16)
+
+
+def _boxes(masks):
+    # Reorder (M, 9, 9) so that axis 1 walks the boxes; the permutation is its own inverse.
+    return masks.reshape(-1, 3, 3, 3, 3).transpose(0, 1, 3, 2, 4).reshape(-1, 9, 9)
+
+
+def _units(masks):
+    return masks, masks.transpose(0, 2, 1), _boxes(masks)
+
+
+def _spread(rows, cols, boxes):
+    # Per-unit (M, 9) masks OR-ed back onto every cell of the unit.
+    return rows[:, :, None] | cols[:, None, :] | boxes[:, BOX_INDEX]
+
+
+def _once(units):
+    once = np.zeros(units.shape[:2], dtype=np.uint16)
+    twice = np.zeros_like(once)
+    for k in range(9):
+        cell = units[:, :, k]
+        twice |= once & cell
+        once |= cell
+    return once, twice
+
+
+def propagate_batch(masks):
+    """Run naked and hidden singles on every puzzle until none of them changes.
+
+    `masks` is updated in place. Returns a boolean array marking puzzles that
+    hit a contradiction: an empty cell, a digit twice in a unit, or a digit
+    with no place left in a unit.
+    """
+    dead = np.zeros(len(masks), dtype=bool)
+    active = np.arange(len(masks))
+    while active.size:
+        m = masks[active]
+        bad = np.zeros(len(m), dtype=bool)
+
+        # Naked singles: a solved cell removes its digit from all its peers.
+        single = POPCOUNT[m] == 1
+        solved = np.where(single, m, 0).astype(np.uint16)
+        ors = []
+        for unit in _units(solved):
+            ors.append(np.bitwise_or.reduce(unit, axis=2))
+            bad |= (unit.sum(axis=2) != ors[-1]).any(axis=1)
+        m = np.where(single, m, m & ~_spread(*ors))
+
+        # Hidden singles: a digit with one open cell left in a unit, and not
+        # already solved elsewhere in it, goes to that cell.
+        single = POPCOUNT[m] == 1
+        solved = np.where(single, m, 0).astype(np.uint16)
+        open_cells = np.where(single, 0, m).astype(np.uint16)
+        unique = []
+        for unit, taken in zip(_units(open_cells), _units(solved)):
+            once, twice = _once(unit)
+            unique.append(once & ~twice & ~np.bitwise_or.reduce(taken, axis=2))
+        hidden = open_cells & _spread(*unique)
+        bad |= (POPCOUNT[hidden] > 1).any(axis=(1, 2))
+        m = np.where(hidden != 0, hidden, m)
+
+        for unit in _units(m):
+            bad |= (np.bitwise_or.reduce(unit, axis=2) != FULL).any(axis=1)
+        bad |= (m == 0).any(axis=(1, 2))
+
+        changed = (m != masks[active]).any(axis=(1, 2))
+        masks[active] = m
+        dead[active[bad]] = True
+        active = active[changed & ~bad]
+    return dead
+
+
+def solve_batch(puzzles, solver=propagation_solve):
+    """Solve an (N, 9, 9) array of puzzles with 0 for blanks.
+
+    Returns (solutions, solved): an (N, 9, 9) int8 array, all zeros for puzzles
+    without a solution, and a boolean array of which puzzles were solved.
+    """
+    masks = candidate_masks(puzzles)
+    dead = propagate_batch(masks)
+    solutions = DIGIT[masks]
+    solved = ~dead & (solutions > 0).all(axis=(1, 2))
+
+    for n in np.flatnonzero(~dead & ~solved):
+        board = solutions[n].tolist()
+        if solver(board):
+            solutions[n] = board
+            solved[n] = True
+    solutions[~solved] = 0
+    return solutions, solved